@@ -1,5 +1,7 @@
 """Defines Azure's StorageShare sub-class."""
 
+from types import MappingProxyType
+
 import dynafed_storagestats.base
 import dynafed_storagestats.azure.helpers as azurehelpers
 
@@ -15,6 +17,20 @@ class AzureStorageShare(dynafed_storagestats.base.StorageShare):
 
     """
 
+    validators = MappingProxyType({
+        **dynafed_storagestats.base.StorageShare.validators,
+        'azure.key': {
+            'required': True,
+            'status_code': '010',
+        },
+        'storagestats.api': {
+            'default': 'generic',
+            'required': False,
+            'status_code': '070',
+            'valid': ['generic', 'list-blobs', 'metrics'],
+        },
+    })
+
     def __init__(self, *args, **kwargs):
         """Extend StorageShare class attributes."""
         # First we call the super function to initialize the initial attributes
@@ -23,19 +39,6 @@ class AzureStorageShare(dynafed_storagestats.base.StorageShare):
 
         self.storageprotocol = "Azure"
 
-        self.validators.update({
-            'azure.key': {
-                'required': True,
-                'status_code': '010',
-            },
-            'storagestats.api': {
-                'default': 'generic',
-                'required': False,
-                'status_code': '070',
-                'valid': ['generic', 'list-blobs', 'metrics'],
-            },
-        })
-
         # Invoke the validate_plugin_settings() method
         self.validate_plugin_settings()
 
@@ -49,10 +52,9 @@ class AzureStorageShare(dynafed_storagestats.base.StorageShare):
     def get_storagestats(self):
         """Contact endpoint using requested method."""
 
-        if (
-            self.plugin_settings['storagestats.api'].lower() == 'generic'
-            or self.plugin_settings['storagestats.api'].lower() == 'list-blobs'
-        ):
+        _api = self.plugin_settings['storagestats.api'].lower()
+
+        if _api in ('generic', 'list-blobs'):
             azurehelpers.list_blobs(self)
 
     def get_filelist(self, delta=1, prefix='', report_file='/tmp/filelist_report.txt'):
@@ -1,10 +1,11 @@
 """Helper functions used to contact Azure based API's."""
 
-import datetime
+import functools
 import logging
+import time
 
-from azure.storage.blob.baseblobservice import BaseBlobService
-import azure.common
+from azure.core.exceptions import AzureError, HttpResponseError, ResourceNotFoundError
+from azure.storage.blob import BlobServiceClient
 
 import dynafed_storagestats.exceptions
 import dynafed_storagestats.helpers
@@ -18,11 +19,37 @@ import dynafed_storagestats.time
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Maximum number of blobs the API returns per request.
+_MAX_RESULTS_PER_PAGE = 5000
+
 
 ##############
 # Functions #
 ##############
 
+@functools.lru_cache(maxsize=32)
+def get_blob_service(account_url, key):
+    """Return a BlobServiceClient for the given account, reusing existing ones.
+
+    The client keeps its own pooled HTTP session, so caching it lets
+    StorageShares under the same account share connections instead of opening
+    new ones.
+
+    Arguments:
+    account_url -- string containing the account's blob service URL.
+    key -- string containing Azure storage account key.
+
+    Returns:
+    azure.storage.blob.BlobServiceClient
+
+    """
+
+    return BlobServiceClient(
+        account_url=account_url,
+        credential=key,
+    )
+
+
 def list_blobs(storage_share, delta=1, prefix='',
                report_file='/tmp/filelist_report.txt',
                request='storagestats'
@@ -41,94 +68,71 @@ def list_blobs(storage_share, delta=1, prefix='',
     _total_bytes = 0
     _total_files = 0
 
-    _base_blob_service = BaseBlobService(
-        account_name=storage_share.uri['account'],
-        account_key=storage_share.plugin_settings['azure.key'],
-        # Set to true if using Azurite storage emulator for testing.
-        is_emulated=False
+    _blob_service = get_blob_service(
+        'https://{netloc}'.format(netloc=storage_share.uri['netloc']),
+        storage_share.plugin_settings['azure.key']
     )
 
     _container_name = storage_share.uri['container']
-    _next_marker = None
+    _container_client = _blob_service.get_container_client(_container_name)
     _timeout = int(storage_share.plugin_settings['conn_timeout'])
 
     _logger.debug(
         "[%s]Requesting storage stats with: URN: %s API Method: %s Account: %s Container: %s",
         storage_share.id, storage_share.uri['url'],
-        storage_share.plugin_settings['storagestats.api'].lower(),
+        storage_share.plugin_settings['storagestats.api'],
         storage_share.uri['account'],
         storage_share.uri['container']
     )
 
-    while True:
-        try:
-            _blobs = _base_blob_service.list_blobs(
-                _container_name,
-                marker=_next_marker,
-                timeout=_timeout,
-                prefix=prefix,
-            )
-
-        except azure.common.AzureMissingResourceHttpError as ERR:
-            raise dynafed_storagestats.exceptions.ErrorAzureContainerNotFound(
-                error='ContainerNotFound',
-                status_code="404",
-                debug=str(ERR),
-                container=_container_name,
-            )
-
-        except azure.common.AzureHttpError as ERR:
-            raise dynafed_storagestats.exceptions.ConnectionErrorAzureAPI(
-                error='ConnectionError',
-                status_code="400",
-                debug=str(ERR),
-                api=storage_share.plugin_settings['storagestats.api'],
-            )
-
-        except azure.common.AzureException as ERR:
-            raise dynafed_storagestats.exceptions.ConnectionError(
-                error='ConnectionError',
-                status_code="400",
-                debug=str(ERR),
-            )
-
-        else:
-            # Check what type of request is asked being used.
-            if request == 'storagestats':
-                try:  # Make sure we got a list of objects.
-                    _blobs.items
-                except AttributeError:
-                    storage_share.stats['bytesused'] = 0
-                    break
-                else:
-                    try:
-                        for _blob in _blobs:
-                            _total_bytes += int(_blob.properties.content_length)
-                            _total_files += 1
-                    # Investigate
-                    except azure.common.AzureHttpError:
-                        pass
-
-            elif request == 'filelist':
-                try:  # Make sure we got a list of objects.
-                    _blobs.items
-                except AttributeError:
-                    break
-                else:
-                    for _blob in _blobs:
-                        # Output files older than the specified delta.
-                        if dynafed_storagestats.time.mask_timestamp_by_delta(_blob.properties.last_modified, delta):
-                            report_file.write("%s\n" % _blob.name)
-                            _total_files += 1
-
-            # Exit if no "NextMarker" as list is now over.
-            if _next_marker:
-                _next_marker = _blobs.next_marker
-            else:
-                break
+    # The listing is paged lazily by the SDK, so errors can be raised at any
+    # point while iterating over it.
+    try:
+        _blobs = _container_client.list_blobs(
+            name_starts_with=prefix or None,
+            results_per_page=_MAX_RESULTS_PER_PAGE,
+            timeout=_timeout,
+        )
+
+        # Check what type of request is asked being used.
+        if request == 'storagestats':
+            for _page in _blobs.by_page():
+                _sizes = [_blob.size for _blob in _page]
+                _total_bytes += sum(_sizes)
+                _total_files += len(_sizes)
+
+        elif request == 'filelist':
+            for _blob in _blobs:
+                # Output files older than the specified delta.
+                if dynafed_storagestats.time.mask_timestamp_by_delta(_blob.last_modified, delta):
+                    report_file.write("%s\n" % _blob.name)
+                    _total_files += 1
+
+    except ResourceNotFoundError as ERR:
+        raise dynafed_storagestats.exceptions.ErrorAzureContainerNotFound(
+            error='ContainerNotFound',
+            status_code="404",
+            debug=str(ERR),
+            container=_container_name,
+        )
+
+    except HttpResponseError as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionErrorAzureAPI(
+            error='ConnectionError',
+            status_code="400",
+            debug=str(ERR),
+            api=storage_share.plugin_settings['storagestats.api'],
+        )
+
+    except AzureError as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error='ConnectionError',
+            status_code="400",
+            debug=str(ERR),
+        )
 
     # Save time when data was obtained.
-    storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+    storage_share.stats['endtime'] = int(time.time())
 
     # Process the result for the storage stats.
     if request == 'storagestats':
@@ -1,8 +1,9 @@
 """Define the base Classes StorageEndpoint and StorageShares."""
 
-import datetime
 import logging
+import time
 
+from types import MappingProxyType
 from urllib.parse import urlsplit
 
 import dynafed_storagestats.helpers
@@ -16,6 +17,9 @@ import dynafed_storagestats.exceptions
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Setting values that are typecast to False for "boolean" validators.
+_FALSE_VALUES = frozenset(('false', 'no'))
+
 
 ############
 # Classes ##
@@ -59,6 +63,40 @@ class StorageShare():
 
     """
 
+    # Setting validators used across all SubClasses. Defined once at class
+    # level and extended by each SubClass rather than rebuilt per instance.
+    validators = MappingProxyType({
+        'conn_timeout': {
+            'default': 10,
+            'required': False,
+            'status_code': '005',
+            'type': 'int',
+        },
+        'storagestats.api': {
+            'default': 'generic',
+            'required': False,
+            'status_code': '070',
+            'valid': ['generic'],
+        },
+        'storagestats.frequency': {
+            'default': '600',
+            'required': False,
+            'status_code': '072'
+        },
+        'storagestats.quota': {
+            'default': 'api',
+            'required': False,
+            'status_code': '071',
+        },
+        'ssl_check': {
+            'boolean': True,
+            'default': True,
+            'required': False,
+            'status_code': '006',
+            'valid': ['true', 'false', 'yes', 'no']
+        },
+    })
+
     def __init__(self, storage_share):
         """Create attributes from UGR's endpoint settings and defaults.
 
@@ -113,43 +151,10 @@ class StorageShare():
             'endtime': 0,
             'filecount': -1,
             'quota': 1000**4,
-            'starttime': int(datetime.datetime.now().timestamp()),
+            'starttime': int(time.time()),
             'check': True, # To flag whether this endpoint should be contacted.
         }
 
-        # Setting validators used across all SubClasses.
-        self.validators = {
-            'conn_timeout': {
-                'default': 10,
-                'required': False,
-                'status_code': '005',
-                'type': 'int',
-            },
-            'storagestats.api': {
-                'default': 'generic',
-                'required': False,
-                'status_code': '070',
-                'valid': ['generic'],
-            },
-            'storagestats.frequency': {
-                'default': '600',
-                'required': False,
-                'status_code': '072'
-            },
-            'storagestats.quota': {
-                'default': 'api',
-                'required': False,
-                'status_code': '071',
-            },
-            'ssl_check': {
-                'boolean': True,
-                'default': True,
-                'required': False,
-                'status_code': '006',
-                'valid': ['true', 'false', 'yes', 'no']
-            },
-        }
-
 
     def get_storagestats(self):
         """Contact a storage endpoint and obtain storage stats.
@@ -170,7 +175,7 @@ class StorageShare():
 
         _logger.info("[%s]Validating configured settings.", self.id)
 
-        for _setting in self.validators:
+        for _setting, _validator in self.validators.items():
             _logger.debug(
                 "[%s]Validating setting: %s",
                 self.id,
@@ -178,29 +183,17 @@ class StorageShare():
             )
 
             # First check if the _setting has been defined in the config file..
-            # If it is missing, check if it is required to be defined, and exit
-            # if true, otherwise set it to the default value and print a warning.
-            try:
-                self.plugin_settings[_setting]
+            # If it is missing, check if it is required to be defined, and flag
+            # the endpoint to be skipped if true, otherwise set it to the
+            # default value and print a warning.
+            if _setting not in self.plugin_settings:
+                if _validator['required']:
+                    ERR = dynafed_storagestats.exceptions.ConfigFileErrorMissingRequiredSetting(
+                        error="MissingRequiredSetting",
+                        setting=_setting,
+                        status_code=_validator['status_code'],
+                    )
 
-            except KeyError:
-                try:
-                    if self.validators[_setting]['required']:
-                        raise dynafed_storagestats.exceptions.ConfigFileErrorMissingRequiredSetting(
-                            error="MissingRequiredSetting",
-                            setting=_setting,
-                            status_code=self.validators[_setting]['status_code'],
-                        )
-
-                    else:
-                        raise dynafed_storagestats.exceptions.ConfigFileWarningMissingSetting(
-                            error="MissingSetting",
-                            setting=_setting,
-                            setting_default=self.validators[_setting]['default'],
-                            status_code=self.validators[_setting]['status_code'],
-                        )
-
-                except dynafed_storagestats.exceptions.ConfigFileErrorMissingRequiredSetting as ERR:
                     # Mark StorageShare/endpoint to be skipped with a reason.
                     self.stats['check'] = 'MissingRequiredSetting'
                     self.plugin_settings.update({_setting: ''})
@@ -209,9 +202,16 @@ class StorageShare():
                     self.debug.append("[ERROR]" + ERR.debug)
                     self.status.append("[ERROR]" + ERR.error_code)
 
-                except dynafed_storagestats.exceptions.ConfigFileWarningMissingSetting as WARN:
+                else:
+                    WARN = dynafed_storagestats.exceptions.ConfigFileWarningMissingSetting(
+                        error="MissingSetting",
+                        setting=_setting,
+                        setting_default=_validator['default'],
+                        status_code=_validator['status_code'],
+                    )
+
                     # Set the default value for this setting.
-                    self.plugin_settings.update({_setting: self.validators[_setting]['default']})
+                    self.plugin_settings.update({_setting: _validator['default']})
 
                     _logger.warning("[%s]%s", self.id, WARN.debug)
                     self.debug.append("[WARNING]" + WARN.debug)
@@ -220,35 +220,20 @@ class StorageShare():
             # If the _setting has been defined, check against a list of valid
             # plugin_settings if defined. Also, typecast to boolean form those
             # that have the "boolean" key set as true.
-            else:
-                try:
-                    if self.plugin_settings[_setting] not in self.validators[_setting]['valid']:
-                        # Mark StorageShare/endpoint to be skipped with a reason.
-                        self.stats['check'] = 'InvalidSetting'
-                        raise dynafed_storagestats.exceptions.ConfigFileErrorInvalidSetting(
-                            error="InvalidSetting",
-                            setting=_setting,
-                            status_code=self.validators[_setting]['status_code'],
-                            valid_plugin_settings=self.validators[_setting]['valid']
-                        )
-
-                    else:
-                        try:
-                            self.validators[_setting]['boolean']
-
-                        except KeyError:
-                            pass
-
-                        else:
-                            if self.plugin_settings[_setting].lower() == 'false'\
-                            or self.plugin_settings[_setting].lower() == 'no':
-                                self.plugin_settings.update({_setting: False})
-                            else:
-                                self.plugin_settings.update({_setting: True})
-
-                except KeyError:
-                    # The 'valid' key is not required to exist.
-                    pass
+            elif 'valid' in _validator:
+                if self.plugin_settings[_setting] not in _validator['valid']:
+                    # Mark StorageShare/endpoint to be skipped with a reason.
+                    self.stats['check'] = 'InvalidSetting'
+                    raise dynafed_storagestats.exceptions.ConfigFileErrorInvalidSetting(
+                        error="InvalidSetting",
+                        setting=_setting,
+                        status_code=_validator['status_code'],
+                        valid_plugin_settings=_validator['valid']
+                    )
+
+                if _validator.get('boolean'):
+                    self.plugin_settings[_setting] = \
+                        self.plugin_settings[_setting].lower() not in _FALSE_VALUES
 
         # If user has specified an SSL CA bundle:
         if self.plugin_settings['ssl_check']:
@@ -1,14 +1,12 @@
 """Functions to deal with reading the configuration files from UGR."""
 
+import importlib
 import logging
-import glob
 import os
+import re
 import sys
 
-from dynafed_storagestats.azure import base as azure
 from dynafed_storagestats.base import StorageShare, StorageEndpoint
-from dynafed_storagestats.dav import base as dav
-from dynafed_storagestats.s3 import base as s3
 import dynafed_storagestats.exceptions
 
 
@@ -19,6 +17,27 @@ import dynafed_storagestats.exceptions
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Patterns for the UGR configuration lines we care about, e.g.:
+# glb.locplugin[]: /usr/lib64/ugr/libugrlocplugin_s3.so s3-bucket 15 s3s://...
+# locplugin.s3-bucket.s3.priv_key: <key>
+_GLB_LOCPLUGIN_RE = re.compile(r'^glb\.locplugin\[\]:?\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)')
+_LOCPLUGIN_SETTING_RE = re.compile(r'^locplugin\.([^:]+?)\s*:\s*(.*)$')
+
+# Line prefixes checked before trying the patterns above.
+_GLB_LOCPLUGIN_PREFIX = 'glb.locplugin[]'
+_LOCPLUGIN_PREFIX = 'locplugin.'
+
+# UGR plugins supported and the (module, class) of the StorageShare sub-class
+# that handles each one.
+_PLUGIN_DICT = {
+    'libugrlocplugin_dav.so': ('dynafed_storagestats.dav.base', 'DAVStorageShare'),
+    'libugrlocplugin_http.so': ('dynafed_storagestats.dav.base', 'DAVStorageShare'),
+    'libugrlocplugin_s3.so': ('dynafed_storagestats.s3.base', 'S3StorageShare'),
+    'libugrlocplugin_azure.so': ('dynafed_storagestats.azure.base', 'AzureStorageShare'),
+    # 'libugrlocplugin_davrucio.so': RucioStorageShare,
+    # 'libugrlocplugin_dmliteclient.so': DMLiteStorageShare,
+}
+
 
 #############
 # Functions #
@@ -27,31 +46,27 @@ _logger = logging.getLogger(__name__)
 def factory(plugin):
     """Return StorageShare sub-class based on the plugin set in UGR's config.
 
+    The protocol's module is only imported here, so the SDK's of protocols
+    that are not configured (boto3, azure-storage-blob...) are never loaded.
+
     Arguments:
-    plugin -- string to compare against _plugin_dict keys.
+    plugin -- string to compare against _PLUGIN_DICT keys.
 
     Returns:
     StorageShare sub-class object.
 
     """
-    _plugin_dict = {
-        'libugrlocplugin_dav.so': dav.DAVStorageShare,
-        'libugrlocplugin_http.so': dav.DAVStorageShare,
-        'libugrlocplugin_s3.so': s3.S3StorageShare,
-        'libugrlocplugin_azure.so': azure.AzureStorageShare,
-        # 'libugrlocplugin_davrucio.so': RucioStorageShare,
-        # 'libugrlocplugin_dmliteclient.so': DMLiteStorageShare,
-    }
-
-    if plugin in _plugin_dict:
-        return _plugin_dict.get(plugin)
+    _plugin = _PLUGIN_DICT.get(plugin)
 
-    else:
+    if _plugin is None:
         raise dynafed_storagestats.exceptions.UnsupportedPluginError(
             error="UnsupportedPlugin",
             plugin=plugin,
         )
 
+    _module, _class = _plugin
+    return getattr(importlib.import_module(_module), _class)
+
 
 def get_conf_files(config_path):
     """Return list of all files "*.conf" found at the path(s) given.
@@ -83,7 +98,15 @@ def get_conf_files(config_path):
     # We add any other files in the path(s) defined by cli.
     for _element in config_path:
         if os.path.isdir(_element):
-            _config_files = _config_files + sorted(glob.glob(_element + "/" + "*.conf"))
+            # Like glob's "*.conf", skip hidden files.
+            _entries = [
+                _entry.path for _entry in os.scandir(_element)
+                if _entry.name.endswith(".conf")
+                and not _entry.name.startswith(".")
+                and _entry.is_file()
+            ]
+            _entries.sort()
+            _config_files.extend(_entries)
 
         elif os.path.isfile(_element):
             _config_files.append(_element)
@@ -120,37 +143,33 @@ def get_storage_endpoints(storage_share_objects):
 
     """
 
-    _storage_endpoints = []
-    _urls_dict = {}
-
-    # Populate _urls_dict using storage_share_objects URL's as the keys
-    # and each StorageShare as a list under these keys.
+    _storage_endpoints = {}
 
+    # Create a StorageEndpoint for each unique URL in storage_share_objects
+    # and attach every StorageShare that shares this URL, in a single pass.
     for _storage_share_object in storage_share_objects:
-        _urls_dict.setdefault(_storage_share_object.uri['url'], [])
-        _urls_dict[_storage_share_object.uri['url']].append(_storage_share_object)
+        _url = _storage_share_object.uri['url']
 
-    if _urls_dict:
-        _logger.debug(
-            "Dictionary of URL's and associated StorageShares: %s",
-            _urls_dict
-        )
-    else:
+        try:
+            _storage_endpoint = _storage_endpoints[_url]
+
+        except KeyError:
+            _storage_endpoint = _storage_endpoints[_url] = StorageEndpoint(_url)
+
+        _storage_endpoint.add_storage_share(_storage_share_object)
+
+    if not _storage_endpoints:
         _logger.critical("No StorageShares to check found in configuration file(s).")
         print("[CRITICAL]No StorageShares to check found in configuration file(s).", file=sys.stderr)
         sys.exit(1)
 
-    # Generate a StorageEnpoint object from the URL and attach any StorageShares
-    # that share this URL.
-    for _url in _urls_dict:
-        _storage_endpoint = StorageEndpoint(_url)
-
-        for _storage_share in _urls_dict[_url]:
-            _storage_endpoint.add_storage_share(_storage_share)
-
-        _storage_endpoints.append(_storage_endpoint)
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug(
+            "Dictionary of URL's and associated StorageShares: %s",
+            {_url: _storage_endpoint.storage_shares for _url, _storage_endpoint in _storage_endpoints.items()}
+        )
 
-    return _storage_endpoints
+    return list(_storage_endpoints.values())
 
 
 def get_storage_shares(config_path, storage_shares_mask=[]):
@@ -280,6 +299,8 @@ def parse_conf_files(config_files, storage_shares_mask=[]):
 
     _storage_shares = {}
     _global_settings = {}
+    _id = None
+    _prefix = None
 
     for _config_file in config_files:
         try:
@@ -289,65 +310,76 @@ def parse_conf_files(config_files, storage_shares_mask=[]):
                 storage_shares_mask,
             )
 
-            with open(_config_file, "r") as _file:
-                for _line_number, _line in enumerate(_file):
-                    _line = _line.strip()
-
-                    if not _line.startswith("#"):
-                        if "glb.locplugin[]" in _line:
-                            _plugin, _id, _concurrency, _url = _line.split()[1::]
+            # Read and decode the whole file at once; a UnicodeDecodeError
+            # still skips it as before.
+            with open(_config_file, "rb") as _file:
+                _lines = _file.read().decode("utf-8").splitlines()
+
+            for _line_number, _line in enumerate(_lines):
+                _line = _line.strip()
+
+                # Skip blank lines and comments.
+                if not _line or _line[0] == "#":
+                    continue
+
+                if _line.startswith(_GLB_LOCPLUGIN_PREFIX):
+                    _match = _GLB_LOCPLUGIN_RE.match(_line)
+                    if _match:
+                        _plugin, _id, _concurrency, _url = _match.groups()
+                        _prefix = _id + '.'
+                        if _id in storage_shares_mask or len(storage_shares_mask) == 0:
+                            _storage_shares.setdefault(_id, {})
+                            _storage_shares[_id].update({'id': _id})
+                            _storage_shares[_id].update({'url': _url})
+                            _storage_shares[_id].update({'plugin': _plugin.split("/")[-1]})
+
+                            _logger.info(
+                                "Found storage share '%s' using plugin '%s'. "
+                                "Reading configuration.",
+                                _storage_shares[_id]['id'], _storage_shares[_id]['plugin']
+                            )
+
+                elif _line.startswith(_LOCPLUGIN_PREFIX):
+                    _match = _LOCPLUGIN_SETTING_RE.match(_line)
+                    if _match:
+                        _key, _value = _match.groups()
+
+                        # Match the setting to the global '*' or the
+                        # current _id, which may itself contain dots.
+                        if _key.startswith('*.'):
+                            # Add any global settings to its own dictionary.
+                            _setting = _key[2:]
+                            _global_settings.update({_setting: _value})
+                            _logger.info(
+                                "Found global setting 'locplugin.%s': %s.",
+                                _key,
+                                _value
+                            )
+
+                        elif _prefix is not None and _key.startswith(_prefix):
                             if _id in storage_shares_mask or len(storage_shares_mask) == 0:
+                                _setting = _key[len(_prefix):]
                                 _storage_shares.setdefault(_id, {})
-                                _storage_shares[_id].update({'id': _id.strip()})
-                                _storage_shares[_id].update({'url': _url.strip()})
-                                _storage_shares[_id].update({'plugin': _plugin.split("/")[-1]})
-
-                                _logger.info(
-                                    "Found storage share '%s' using plugin '%s'. "
-                                    "Reading configuration.",
-                                    _storage_shares[_id]['id'], _storage_shares[_id]['plugin']
-                                )
-
-                        elif "locplugin" in _line:
-                            _key, _value = _line.partition(":")[::2]
-                            _locid = _key.split('.')[1]
-
-                            # Match an _id in _locid
-                            if _locid == '*':
-                                # Add any global settings to its own dictionary.
-                                _setting = _key.split('*' + '.')[-1]
-                                _global_settings.update({_setting: _value.strip()})
-                                _logger.info(
-                                    "Found global setting '%s': %s.",
-                                    _key,
-                                    _value
-                                )
-
-                            elif _id == _locid:
-                                if _id in storage_shares_mask or len(storage_shares_mask) == 0:
-                                    _setting = _key.split(_id + '.')[-1]
-                                    _storage_shares.setdefault(_id, {})
-                                    _storage_shares[_id].setdefault('plugin_settings', {})
-                                    _storage_shares[_id]['plugin_settings'].update({_setting: _value.strip()})
-                                    _logger.debug(
-                                        "[%s]Found local ID setting '%s'",
-                                        _locid,
-                                        _key.split(_id + '.')[-1],
-                                    )
-
-                            else:
-                                raise dynafed_storagestats.exceptions.ConfigFileErrorIDMismatch(
-                                    storage_share=_id,
-                                    error="SettingIDMismatch",
-                                    line_number=_line_number,
-                                    config_file=_config_file,
-                                    line=_line.split(":")[0],
+                                _storage_shares[_id].setdefault('plugin_settings', {})
+                                _storage_shares[_id]['plugin_settings'].update({_setting: _value})
+                                _logger.debug(
+                                    "[%s]Found local ID setting '%s'",
+                                    _id,
+                                    _setting,
                                 )
 
                         else:
-                            # Ignore any other lines
-                            # print( "I don't know what to do with %s", _line)
-                            pass
+                            raise dynafed_storagestats.exceptions.ConfigFileErrorIDMismatch(
+                                storage_share=_id,
+                                error="SettingIDMismatch",
+                                line_number=_line_number,
+                                config_file=_config_file,
+                                line=_line.split(":")[0],
+                            )
+
+                # Ignore any other lines.
+                else:
+                    continue
 
         except UnicodeDecodeError:
             _logger.warning("Cannot parse file, skipping configuration in %s", _config_file)
@@ -1,6 +1,7 @@
 """Defines DAV's StorageShare sub-class."""
 
 import logging
+from types import MappingProxyType
 
 import dynafed_storagestats.base
 import dynafed_storagestats.dav.helpers as davhelpers
@@ -13,6 +14,12 @@ import dynafed_storagestats.dav.helpers as davhelpers
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Translation of DAV URN schemas into the ones used for the HTTP requests.
+_SCHEMA_MAP = {
+    'dav': 'http',
+    'davs': 'https',
+}
+
 
 ############
 # Classes #
@@ -25,6 +32,24 @@ class DAVStorageShare(dynafed_storagestats.base.StorageShare):
 
     """
 
+    validators = MappingProxyType({
+        **dynafed_storagestats.base.StorageShare.validators,
+        'cli_certificate': {
+            'required': True,
+            'status_code': '003',
+        },
+        'cli_private_key': {
+            'required': True,
+            'status_code': '004',
+        },
+        'storagestats.api': {
+            'default': 'rfc4331',
+            'required': False,
+            'status_code': '070',
+            'valid': ['generic', 'list-objects', 'rfc4331'],
+        },
+    })
+
     def __init__(self, *args, **kwargs):
         """Extend StorageShare class attributes."""
         # First we call the super function to initialize the initial attributes
@@ -33,23 +58,6 @@ class DAVStorageShare(dynafed_storagestats.base.StorageShare):
 
         self.storageprotocol = "DAV"
 
-        self.validators.update({
-            'cli_certificate': {
-                'required': True,
-                'status_code': '003',
-            },
-            'cli_private_key': {
-                'required': True,
-                'status_code': '004',
-            },
-            'storagestats.api': {
-                'default': 'rfc4331',
-                'required': False,
-                'status_code': '070',
-                'valid': ['generic', 'list-objects', 'rfc4331'],
-            },
-        })
-
         # Invoke the validate_plugin_settings() method
         self.validate_plugin_settings()
 
@@ -59,42 +67,27 @@ class DAVStorageShare(dynafed_storagestats.base.StorageShare):
     def get_storagestats(self):
         """Contact endpoint using requested method."""
 
-        if (
-            self.plugin_settings['storagestats.api'].lower() == 'generic'
-            or self.plugin_settings['storagestats.api'].lower() == 'list-objects'
-        ):
+        _api = self.plugin_settings['storagestats.api'].lower()
+
+        if _api in ('generic', 'list-objects'):
             davhelpers.list_files(self)
 
-        elif self.plugin_settings['storagestats.api'].lower() == 'rfc4331':
+        elif _api == 'rfc4331':
             davhelpers.rfc4331(self)
 
     def validate_schema(self):
         """Translate dav/davs into http/https."""
 
-        _schema_translator = {
-            'dav': 'http',
-            'davs': 'https',
-        }
-
         _logger.debug(
             "[%s]Validating URN schema: %s",
             self.id,
             self.uri['scheme']
         )
 
-        if self.uri['scheme'] in _schema_translator:
-
-            _logger.debug(
-                "[%s]Using URN schema: %s",
-                self.id,
-                _schema_translator[self.uri['scheme']]
-            )
+        self.uri['scheme'] = _SCHEMA_MAP.get(self.uri['scheme'], self.uri['scheme'])
 
-            self.uri['scheme'] = _schema_translator[self.uri['scheme']]
-
-        else:
-            _logger.debug(
-                "[%s]Using URN schema: %s",
-                self.id,
-                self.uri['scheme']
-            )
+        _logger.debug(
+            "[%s]Using URN schema: %s",
+            self.id,
+            self.uri['scheme']
+        )
@@ -1,9 +1,14 @@
 """Helper functions used to contact DAV based API's."""
 
-import datetime
 import logging
+import re
+import time
 
+from lxml import etree
 import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
 
 from dynafed_storagestats import xml
 import dynafed_storagestats.exceptions
@@ -16,11 +21,56 @@ import dynafed_storagestats.exceptions
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Path at the end of requests' "Could not find the TLS certificate file,
+# invalid path: <path>" errors.
+_CERTFILE_RE = re.compile(r':\s*([^:]+?)\s*$')
+
+# Retry throttling and transient server errors with exponential backoff. The
+# last response is returned when retries run out so its status code is
+# reported. Connection, read and SSL errors are not retried, so an unreachable
+# endpoint or a bad certificate is reported straight away.
+_RETRY = Retry(
+    total=4,
+    connect=0,
+    read=0,
+    other=0,
+    backoff_factor=2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['PROPFIND', 'GET']),
+    raise_on_status=False,
+)
+
+# Shared session so connections to the same host are pooled and reused. Sized
+# for runner's threads so concurrent requests don't discard connections.
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_RETRY))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_RETRY))
+
 
 ##############
 # Functions ##
 ##############
 
+def _get_certfile(error):
+    """Return the certificate file path given in an IOError's message.
+
+    Arguments:
+    error -- IOError raised by requests for an invalid certificate path.
+
+    Returns:
+    String containing the file path, or the whole message if none is found.
+
+    """
+
+    _message = str(error)
+    _match = _CERTFILE_RE.search(_message)
+
+    if _match:
+        return _match.group(1)
+
+    return _message.strip()
+
+
 def list_files(storage_share):
     """Contact DAV endpoint to list all files and sum their sizes.
 
@@ -40,14 +90,20 @@ def list_files(storage_share):
         path=storage_share.uri['path']
     )
 
-    _headers = {'Depth': 'infinity'}
-    _data = ''
+    # Only ask for the file sizes; "return=minimal" lets the server omit the
+    # 404 propstat of resources without one, like collections.
+    _headers = {
+        'Depth': 'infinity',
+        'Content-Type': 'application/xml',
+        'Prefer': 'return=minimal',
+    }
+    _data = xml.create_getcontentlength_request()
 
     _logger.debug(
         "[%s]Requesting storage stats with: URN: %s API Method: %s Headers: %s Data: %s",
         storage_share.id,
         _api_url,
-        storage_share.plugin_settings['storagestats.api'].lower(),
+        storage_share.plugin_settings['storagestats.api'],
         _headers,
         _data
     )
@@ -61,7 +117,8 @@ def list_files(storage_share):
             storage_share,
             _api_url,
             _headers,
-            _data
+            _data,
+            stream=True
         )
 
     except requests.exceptions.InvalidSchema as ERR:
@@ -72,23 +129,11 @@ def list_files(storage_share):
         )
 
     except requests.exceptions.SSLError as ERR:
-        # If ca_path is custom, try the default in case
-        # a global setting is incorrectly giving the wrong
-        # ca's to check again.
-        try:
-            _response = send_dav_request(
-                storage_share,
-                _api_url,
-                _headers,
-                _data
-            )
-
-        except requests.exceptions.SSLError as ERR:
-            raise dynafed_storagestats.exceptions.ConnectionError(
-                error=ERR.__class__.__name__,
-                status_code="092",
-                debug=str(ERR),
-            )
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code="092",
+            debug=str(ERR),
+        )
 
     except requests.ConnectionError as ERR:
         raise dynafed_storagestats.exceptions.ConnectionError(
@@ -98,9 +143,7 @@ def list_files(storage_share):
         )
 
     except IOError as ERR:
-        # We do some regex magic to get the file path
-        _certfile = str(ERR).split(":")[-1]
-        _certfile = _certfile.replace(' ', '')
+        _certfile = _get_certfile(ERR)
         raise dynafed_storagestats.exceptions.ConnectionErrorDAVCertPath(
             certfile=_certfile,
             debug=str(ERR),
@@ -110,10 +153,37 @@ def list_files(storage_share):
         if _response:
             # Check that we did not get an error code:
             if _response.status_code < 400:
-                storage_share.stats['bytesused'], storage_share.stats['filecount'] = xml.add_xml_getcontentlength(_response.content)
+                # An empty body means there is nothing to list, so skip the
+                # parser which would fail on it.
+                if _response.headers.get('Content-Length') == '0':
+                    _response.close()
+                    storage_share.stats['bytesused'], storage_share.stats['filecount'] = (0, 0)
+
+                else:
+                    # Parse the body as it arrives instead of loading it whole,
+                    # letting urllib3 undo any gzip/deflate content-encoding.
+                    _response.raw.decode_content = True
+                    try:
+                        storage_share.stats['bytesused'], storage_share.stats['filecount'] = xml.add_xml_getcontentlength(_response.raw)
+
+                    # The body is read here, after the request's own except
+                    # clauses, so timeouts, truncated bodies and malformed XML
+                    # while streaming have to be handled separately.
+                    except (
+                        requests.exceptions.RequestException,
+                        urllib3.exceptions.HTTPError,
+                        etree.XMLSyntaxError,
+                    ) as ERR:
+                        raise dynafed_storagestats.exceptions.ConnectionError(
+                            error=ERR.__class__.__name__,
+                            status_code="400",
+                            debug=str(ERR),
+                        )
+
+                    finally:
+                        _response.close()
+
                 storage_share.stats['quota'] = int(storage_share.plugin_settings['storagestats.quota'])
-                print("quota: %s, type: %s" % (storage_share.stats['quota'], type(storage_share.stats['quota'])))
-                print("bytesused: %s, type: %s" % (storage_share.stats['bytesused'], type(storage_share.stats['bytesused'])))
                 storage_share.stats['bytesfree'] = storage_share.stats['quota'] - storage_share.stats['bytesused']
 
             else:
@@ -150,7 +220,7 @@ def rfc4331(storage_share):
         "[%s]Requesting storage stats with: URN: %s API Method: %s Headers: %s Data: %s",
         storage_share.id,
         _api_url,
-        storage_share.plugin_settings['storagestats.api'].lower(),
+        storage_share.plugin_settings['storagestats.api'],
         _headers,
         _data
     )
@@ -175,23 +245,11 @@ def rfc4331(storage_share):
         )
 
     except requests.exceptions.SSLError as ERR:
-        # If ca_path is custom, try the default in case
-        # a global setting is incorrectly giving the wrong
-        # ca's to check agains.
-        try:
-            _response = send_dav_request(
-                storage_share,
-                _api_url,
-                _headers,
-                _data
-            )
-
-        except requests.exceptions.SSLError as ERR:
-            raise dynafed_storagestats.exceptions.ConnectionError(
-                error=ERR.__class__.__name__,
-                status_code="092",
-                debug=str(ERR),
-            )
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code="092",
+            debug=str(ERR),
+        )
 
     except requests.ConnectionError as ERR:
         raise dynafed_storagestats.exceptions.ConnectionError(
@@ -201,9 +259,7 @@ def rfc4331(storage_share):
         )
 
     except IOError as ERR:
-        # We do some regex magic to get the filepath
-        _certfile = str(ERR).split(":")[-1]
-        _certfile = _certfile.replace(' ', '')
+        _certfile = _get_certfile(ERR)
         raise dynafed_storagestats.exceptions.ConnectionErrorDAVCertPath(
             certfile=_certfile,
             debug=str(ERR),
@@ -223,7 +279,7 @@ def rfc4331(storage_share):
                 )
 
 
-def send_dav_request(storage_share, api_url, headers, data):
+def send_dav_request(storage_share, api_url, headers, data, stream=False):
     """Contact DAV endpoint with given headers and data.
 
     Arguments:
@@ -233,13 +289,15 @@ def send_dav_request(storage_share, api_url, headers, data):
     data -- string containing data to be sent in the request. RFC4331 method
             uses this to request the stats in XML format. Obtained from:
             dynafed_storagestats.xml.create_rfc4331_request()
+    stream -- boolean. If True the body is not downloaded until it is read
+              from the response, e.g. through response.raw.
 
     Returns:
     String containing endpoint's response.
 
     """
 
-    _response = requests.request(
+    _response = _SESSION.request(
         method="PROPFIND",
         url=api_url,
         cert=(
@@ -249,16 +307,21 @@ def send_dav_request(storage_share, api_url, headers, data):
         headers=headers,
         verify=storage_share.plugin_settings['ssl_check'],
         data=data,
+        stream=stream,
         timeout=int(storage_share.plugin_settings['conn_timeout'])
     )
-    # Save time when data was obtained.
-    storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
-
-    # Log contents of response
-    _logger.debug(
-        "[%s]Endpoint reply: %s",
-        storage_share.id,
-        _response.text
-    )
+    # Save time when data was obtained. This is reported as an epoch
+    # timestamp, so it has to come from the wall clock.
+    if _response.status_code < 400:
+        storage_share.stats['endtime'] = int(time.time())
+
+    # Log contents of response, only decoding the body when it will be logged.
+    # Streamed bodies are left for the caller to consume.
+    if not stream and _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug(
+            "[%s]Endpoint reply: %s",
+            storage_share.id,
+            _response.text
+        )
 
     return _response
@@ -489,6 +489,21 @@ class CephS3QuotaDisabledWarning(Warning):
         super().__init__(error=error, status_code=status_code, message=self.message, debug=self.debug)
 
 
+class CloudwatchNoDatapointsWarning(Warning):
+    """
+    Exception warning when AWS Cloudwatch returns no datapoints for one of the
+    requested bucket metrics, usually because they have not been published
+    yet. The objects are then listed to obtain the storage stats.
+    """
+    def __init__(self, metric, error="NoCloudwatchDatapoints", status_code="097", debug=None):
+
+        self.message = 'Cloudwatch returned no datapoints for metric "%s". Listing objects instead.' \
+                       % (metric)
+        self.debug = debug
+
+        super().__init__(error=error, status_code=status_code, message=self.message, debug=self.debug)
+
+
 class DAVZeroQuotaWarning(Warning):
     """
     Exception warning when a DAV based endpoint utilizing RFC4331 returns
@@ -21,6 +21,24 @@ from dynafed_storagestats import time
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Size setting: integer number followed by an optional storage space unit.
+_SIZE_RE = re.compile(r'^\s*([-+]?\d+)\s*([kmgtp]i?b|b)?\s*$', re.IGNORECASE)
+
+# Bytes per storage space unit, keyed by the lower-case unit.
+_SIZE_MULTIPLIERS = {
+    'b': 1,
+    'kib': 1024,
+    'mib': 1024**2,
+    'gib': 1024**3,
+    'tib': 1024**4,
+    'pib': 1024**5,
+    'kb': 1000,
+    'mb': 1000**2,
+    'gb': 1000**3,
+    'tb': 1000**4,
+    'pb': 1000**5,
+}
+
 
 #############
 # Functions #
@@ -171,34 +189,17 @@ def convert_size_to_bytes(size):
 
     """
 
-    _multipliers = {
-        'kib': 1024,
-        'mib': 1024**2,
-        'gib': 1024**3,
-        'tib': 1024**4,
-        'pib': 1024**5,
-        'kb': 1000,
-        'mb': 1000**2,
-        'gb': 1000**3,
-        'tb': 1000**4,
-        'pb': 1000**5,
-    }
-
-    for _suffix in _multipliers:
-        if size.lower().endswith(_suffix):
-            return int(size[0:-len(_suffix)]) * _multipliers[_suffix]
-
-    else:
-        if size.lower().endswith('b'):
-            return int(size[0:-1])
-
-    try:
-        return int(size)
+    _match = _SIZE_RE.match(size)
 
-    except ValueError:  # for example "1024x"
+    if _match is None:  # for example "1024x"
         print('Malformed input for setting: "storagestats.quota"', file=sys.stderr)
         exit()
 
+    # A number without unit is taken as bytes.
+    _number, _unit = _match.groups()
+
+    return int(_number) * _SIZE_MULTIPLIERS[(_unit or 'b').lower()]
+
 
 def get_currentstats(storage_share_objects, memcached_ip='127.0.0.1', memcached_port='11211'):
     """Obtain StorageShares' status contained in memcached and return as dict.
@@ -424,23 +425,29 @@ def get_cached_storage_stats(storage_share_objects, return_as='string', memcache
         memcached_port
     )
 
+    # Indices in memcache to look for.
+    _indices = ['Ugrstoragestats_' + _storage_share.id for _storage_share in storage_share_objects]
+
+    _logger.debug(
+        "Using memcached storage stats indices: %s",
+        _indices
+    )
+
+    # Obtain all the indices in a single request.
+    _memcached_contents = memcache.get_multi(
+        _indices,
+        memcached_ip,
+        memcached_port
+    )
+
     _array_of_stats = []
 
-    for _storage_share in storage_share_objects:
-        # Index in memcache to look for:
-        _idx = 'Ugrstoragestats_' + _storage_share.id
-        # Obtain the latest status uploaded by UGR and typecast to str if needed.
-        # Different versions of memcache module return bytes.
-        _logger.debug(
-            "Using memcached storage stats index: %s",
-            _idx
-        )
+    for _idx in _indices:
+        try:
+            _storage_stats = _memcached_contents[_idx]
 
-        _storage_stats = memcache.get(
-            _idx,
-            memcached_ip,
-            memcached_port
-        )
+        except KeyError:
+            raise dynafed_storagestats.exceptions.MemcachedIndexError()
 
         # Typecast to str if needed. Different versions of memcache module return
         # bytes.
@@ -746,7 +753,7 @@ def process_endpoint_list_results(storage_share_objects):
                 )
 
             else:
-                storage_share_objects[_storage_share].stats['quota'] = (
+                storage_share_objects[_storage_share].stats['quota'] = int(
                     storage_share_objects[_storage_share].plugin_settings['storagestats.quota']
                 )
                 storage_share_objects[_storage_share].stats['bytesfree'] = (
@@ -934,8 +941,25 @@ def process_storage_reports(storage_endpoint, args):
         storage_endpoint.storage_shares[0].debug.append("[ERROR]" + ERR.debug)
         storage_endpoint.storage_shares[0].status.append("[ERROR]" + ERR.error_code)
 
+    # Any other exception is unexpected, but the shares must still be flagged
+    # so they are not reported as OK below with their stats unset.
+    except Exception as ERR:
+        _logger.error(
+            "[%s]Unexpected error obtaining storage stats: %s",
+            storage_endpoint.storage_shares[0].id,
+            ERR,
+            exc_info=True
+        )
+        ERR = dynafed_storagestats.exceptions.Error(
+            error=ERR.__class__.__name__,
+            debug=str(ERR),
+        )
+        storage_endpoint.storage_shares[0].debug.append("[ERROR]" + ERR.debug)
+        storage_endpoint.storage_shares[0].status.append("[ERROR]" + ERR.error_code)
+
     finally:
-        # Copy results if there are multiple endpoints under one URL.
+        # Copy results if there are multiple endpoints under one URL. This
+        # includes the status and debug messages.
         process_endpoint_list_results(storage_endpoint.storage_shares)
 
 
@@ -945,8 +969,9 @@ def process_storagestats(storage_endpoint, args):
     Runs get_storagestats() method for the first StorageShare in the list of the
     StorageEndpoint as long as it has not been flagged as offline. It then calls
     process_endpoint_list_results() to copy the results if there are multiple
-    StorageShares. Then if requested upload the stats to memcached.
-    Also handles the exceptions to failures in obtaining the stats.
+    StorageShares. Also handles the exceptions to failures in obtaining the
+    stats. Uploading to memcached is done for all the StorageEndpoints at once
+    by process_storagestats_memcached().
 
     Arguments:
     storage_endpoint -- dynafed_storagestats StorageEndpoint.
@@ -993,8 +1018,25 @@ def process_storagestats(storage_endpoint, args):
         storage_endpoint.storage_shares[0].debug.append("[ERROR]" + ERR.debug)
         storage_endpoint.storage_shares[0].status.append("[ERROR]" + ERR.error_code)
 
+    # Any other exception is unexpected, but the shares must still be flagged
+    # so they are not reported as OK below with their stats unset.
+    except Exception as ERR:
+        _logger.error(
+            "[%s]Unexpected error obtaining storage stats: %s",
+            storage_endpoint.storage_shares[0].id,
+            ERR,
+            exc_info=True
+        )
+        ERR = dynafed_storagestats.exceptions.Error(
+            error=ERR.__class__.__name__,
+            debug=str(ERR),
+        )
+        storage_endpoint.storage_shares[0].debug.append("[ERROR]" + ERR.debug)
+        storage_endpoint.storage_shares[0].status.append("[ERROR]" + ERR.error_code)
+
     finally:
-        # Copy results if there are multiple endpoints under one URL.
+        # Copy results if there are multiple endpoints under one URL. This
+        # includes the status and debug messages.
         process_endpoint_list_results(storage_endpoint.storage_shares)
 
         for storage_share in storage_endpoint.storage_shares:
@@ -1005,15 +1047,37 @@ def process_storagestats(storage_endpoint, args):
             else:
                 storage_share.status = ','.join(storage_share.status)
 
-            # Try to upload stats to memcached.
-            if args.output_memcached:
-                try:
-                    output.to_memcached(storage_share, args.memcached_ip, args.memcached_port)
 
-                except dynafed_storagestats.exceptions.MemcachedConnectionError as ERR:
-                    _logger.error("[%s]%s", storage_share.id, ERR.debug)
-                    storage_share.debug.append("[ERROR]" + ERR.debug)
-                    storage_share.status = storage_share.status + "," + "[ERROR]" + ERR.error_code
+def process_storagestats_memcached(storage_endpoints, args):
+    """Upload the storage stats of all StorageEndpoints' shares to memcached.
+
+    All the StorageShares are sent in a batch rather than one request each.
+    Any StorageShare whose stats could not be uploaded has the error added to
+    its status.
+
+    Arguments:
+    storage_endpoints -- list of dynafed_storagestats StorageEndpoint objects.
+    args -- args -- argparse object.
+
+    """
+
+    _storage_shares = [
+        storage_share
+        for storage_endpoint in storage_endpoints
+        for storage_share in storage_endpoint.storage_shares
+    ]
+
+    _failed_storage_shares = output.to_memcached_multi(
+        _storage_shares,
+        args.memcached_ip,
+        args.memcached_port
+    )
+
+    for storage_share in _failed_storage_shares:
+        ERR = dynafed_storagestats.exceptions.MemcachedConnectionError()
+        _logger.error("[%s]%s", storage_share.id, ERR.debug)
+        storage_share.debug.append("[ERROR]" + ERR.debug)
+        storage_share.status = storage_share.status + "," + "[ERROR]" + ERR.error_code
 
 
 def update_storage_share_storagestats(storage_share_objects, stats):
@@ -1041,9 +1105,10 @@ def update_storage_share_storagestats(storage_share_objects, stats):
                     _storage_share.id,
                     stats[_storage_share.id]
                 )
-                _storage_share.stats['endtime'] = stats[_storage_share.id]['timestamp']
-                _storage_share.stats['bytesused'] = stats[_storage_share.id]['bytesused']
-                _storage_share.stats['bytesfree'] = stats[_storage_share.id]['bytesfree']
+                # Memcached stores the values as text, the stats are numeric.
+                _storage_share.stats['endtime'] = int(stats[_storage_share.id]['timestamp'])
+                _storage_share.stats['bytesused'] = int(stats[_storage_share.id]['bytesused'])
+                _storage_share.stats['bytesfree'] = int(stats[_storage_share.id]['bytesfree'])
 
         except KeyError:
             _logger.info(
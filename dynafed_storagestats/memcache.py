@@ -5,10 +5,44 @@ import memcache
 import dynafed_storagestats.exceptions
 
 
+####################
+# Module Variables #
+####################
+
+# memcache.Client objects keyed by (ip, port) of the server they connect to.
+_CLIENTS = {}
+
+
 #############
 # Functions #
 #############
 
+def _get_client(memcached_ip, memcached_port):
+    """Return the memcache.Client for the given server, creating it if needed.
+
+    memcache.Client keeps its connections in thread-local storage, so the same
+    object can be shared by the worker threads.
+
+    Arguments:
+    memcached_ip   -- memcached instance IP.
+    memcahced_port -- memcached instance Port.
+
+    Returns:
+    memcache.Client object.
+
+    """
+    _server = (memcached_ip, memcached_port)
+
+    try:
+        return _CLIENTS[_server]
+
+    except KeyError:
+        return _CLIENTS.setdefault(
+            _server,
+            memcache.Client([memcached_ip + ':' + memcached_port])
+        )
+
+
 def get(index, memcached_ip='127.0.0.1', memcached_port='11211'):
     """Get the contents of the given index from a memcached instance.
 
@@ -22,8 +56,7 @@ def get(index, memcached_ip='127.0.0.1', memcached_port='11211'):
 
     """
     # Setup connection to a memcache instance
-    _memcached_server = memcached_ip + ':' + memcached_port
-    _memcached_client = memcache.Client([_memcached_server])
+    _memcached_client = _get_client(memcached_ip, memcached_port)
     _memcached_content = _memcached_client.get(index)
 
     if _memcached_content is None:
@@ -33,6 +66,24 @@ def get(index, memcached_ip='127.0.0.1', memcached_port='11211'):
         return _memcached_content
 
 
+def get_multi(indices, memcached_ip='127.0.0.1', memcached_port='11211'):
+    """Get the contents of several indices from a memcached instance at once.
+
+    Arguments:
+    indices -- list of strings defining the indices to read from in memcache.
+    memcached_ip   -- memcached instance IP.
+    memcahced_port -- memcached instance Port.
+
+    Returns:
+    Dict of the indices found and their contents. Missing indices are left out.
+
+    """
+    # Setup connection to a memcache instance
+    _memcached_client = _get_client(memcached_ip, memcached_port)
+
+    return _memcached_client.get_multi(indices)
+
+
 def set(index, data, memcached_ip='127.0.0.1', memcached_port='11211', ttl=3600):
     """Upload the data given to an index of a memcached instance.
 
@@ -45,9 +96,26 @@ def set(index, data, memcached_ip='127.0.0.1', memcached_port='11211', ttl=3600)
 
     """
     # Setup connection to a memcache instance
-    _memcached_server = memcached_ip + ':' + memcached_port
-    _memcached_client = memcache.Client([_memcached_server])
+    _memcached_client = _get_client(memcached_ip, memcached_port)
     _memcached_result = _memcached_client.set(index, data, time=ttl)
 
     if _memcached_result == 0:
         raise dynafed_storagestats.exceptions.MemcachedConnectionError()
+
+
+def set_multi(mapping, memcached_ip='127.0.0.1', memcached_port='11211', ttl=3600):
+    """Upload several indices to a memcached instance in a single request.
+
+    Arguments:
+    mapping -- dict of index strings and the data strings to set into them.
+    memcached_ip   -- memcached instance IP.
+    memcahced_port -- memcached instance Port.
+    ttl -- Time to live expiry of indexed data. Default of 1 hour.
+
+    Returns:
+    List of the indices that could not be set.
+
+    """
+    _memcached_client = _get_client(memcached_ip, memcached_port)
+
+    return _memcached_client.set_multi(mapping, time=ttl)
@@ -1,11 +1,9 @@
 """Functions to deal with the formatting and handling data to output."""
 
-import os
 import logging
 
 import dynafed_storagestats.exceptions
 from dynafed_storagestats import memcache
-from dynafed_storagestats import json
 from dynafed_storagestats import xml
 
 
@@ -21,72 +19,116 @@ _logger = logging.getLogger(__name__)
 # Functions #
 #############
 
-def to_memcached(storage_share, memcached_ip='127.0.0.1', memcached_port='11211', ttl_multiplier=10):
-    """Upload the StorageShare storage stats to a memcached instance.
+def _get_memcached_payload(storage_share):
+    """Return the string with the StorageShare's stats to upload to memcached.
 
     Arguments:
     storage_share  -- dynafed_storagestats StorageShare object.
-    memcached_ip   -- memcached instance IP.
-    memcahced_port -- memcached instance Port.
-    ttl_multiplier -- multiplier to calculate memcache data ttl.
 
-    Memcache output is a string of the following variables concatenated by '%%':
+    Returns:
+    String of the following variables concatenated by '%%':
     storage_share.id
     storage_share.storageprotocol
+    storage_share.stats['starttime']
+    storage_share.stats['quota']
     storage_share.stats['bytesused']
     storage_share.stats['bytesfree']
-    storage_share.stats['quota']
-    storage_share.stats['starttime']
+    storage_share.status
 
     """
 
-    _memcached_index = "Ugrstoragestats_" + storage_share.id
+    _stats = storage_share.stats
+
+    return '{}%%{}%%{}%%{}%%{}%%{}%%{}'.format(
+        storage_share.id,
+        storage_share.storageprotocol,
+        _stats['starttime'],
+        _stats['quota'],
+        _stats['bytesused'],
+        _stats['bytesfree'],
+        storage_share.status,
+    )
+
+
+def _get_memcached_ttl(storage_share, ttl_multiplier=10):
+    """Return how long, in seconds, to keep the StorageShare's stats in memcached.
+
+    Calculated as a multiple of the check frequency, with a minimum of 1 hour.
+
+    Arguments:
+    storage_share  -- dynafed_storagestats StorageShare object.
+    ttl_multiplier -- multiplier to calculate memcache data ttl.
+
+    Returns:
+    Integer.
+
+    """
 
-    # Calculate how long to store data in memcached as a multiple of the check
-    # frequency. However the minimum us set to 1 hour.
     _memcached_ttl = int(storage_share.plugin_settings['storagestats.frequency']) * ttl_multiplier
     if _memcached_ttl < 3600:
         _memcached_ttl = 3600
 
-    # Join stats to create the string to upload.
-    _storagestats = '%%'.join([
-        storage_share.id,
-        storage_share.storageprotocol,
-        str(storage_share.stats['starttime']),
-        str(storage_share.stats['quota']),
-        str(storage_share.stats['bytesused']),
-        str(storage_share.stats['bytesfree']),
-        storage_share.status,
-    ])
+    return _memcached_ttl
+
+
+def to_memcached_multi(storage_shares, memcached_ip='127.0.0.1', memcached_port='11211', ttl_multiplier=10):
+    """Upload the storage stats of several StorageShares to memcached at once.
+
+    Shares are grouped by their time to live and each group is sent with a
+    single set_multi request, instead of one request per StorageShare.
+
+    Arguments:
+    storage_shares -- list of dynafed_storagestats StorageShare objects.
+    memcached_ip   -- memcached instance IP.
+    memcahced_port -- memcached instance Port.
+    ttl_multiplier -- multiplier to calculate memcache data ttl.
+
+    Returns:
+    List of the StorageShare objects whose stats could not be uploaded.
+
+    """
+
+    _storage_shares_by_ttl = {}
+    for storage_share in storage_shares:
+        _storage_shares_by_ttl.setdefault(
+            _get_memcached_ttl(storage_share, ttl_multiplier), []
+        ).append(storage_share)
 
     _logger.info(
-        "[%s]Uploading stats to memcached server: %s",
-        storage_share.id,
+        "Uploading stats of %s storage shares to memcached server: %s",
+        len(storage_shares),
         memcached_ip + ':' + memcached_port
     )
-    _logger.debug(
-        "[%s]Using memcached index: %s",
-        storage_share.id,
-        _memcached_index
-    )
-    _logger.debug(
-        "[%s]String uploading to memcached: %s",
-        storage_share.id,
-        _storagestats
-    )
-    _logger.debug(
-        "[%s]Time to live for memcached data: %s",
-        storage_share.id,
-        _memcached_ttl
-    )
 
-    memcache.set(
-        _memcached_index,
-        _storagestats,
-        memcached_ip,
-        memcached_port,
-        _memcached_ttl
-    )
+    _failed_storage_shares = []
+
+    for _memcached_ttl, _storage_shares in _storage_shares_by_ttl.items():
+        _mapping = {
+            "Ugrstoragestats_" + storage_share.id: _get_memcached_payload(storage_share)
+            for storage_share in _storage_shares
+        }
+
+        _logger.debug(
+            "Strings uploading to memcached with time to live %s: %s",
+            _memcached_ttl,
+            _mapping
+        )
+
+        _failed_indices = set(
+            memcache.set_multi(
+                _mapping,
+                memcached_ip,
+                memcached_port,
+                _memcached_ttl
+            )
+        )
+
+        _failed_storage_shares.extend(
+            storage_share for storage_share in _storage_shares
+            if "Ugrstoragestats_" + storage_share.id in _failed_indices
+        )
+
+    return _failed_storage_shares
 
 
 def to_plaintext(storage_endpoints, filename, path):
@@ -144,11 +186,9 @@ def to_xml(storage_endpoints, filename, path):
     # Create output path
     _filepath = path + '/' + filename
 
-    _xml_file = xml.format_StAR(storage_endpoints)
-
-    with open(_filepath, 'w') as output:
-        output.write(_xml_file)
-        output.close()
+    with open(_filepath, 'wb') as output:
+        for _chunk in xml.format_StAR(storage_endpoints):
+            output.write(_chunk)
 
 
 def to_stdout(storage_endpoints, args):
@@ -169,38 +209,47 @@ def to_stdout(storage_endpoints, args):
     args.memcached_port -- memcached instance Port.
 
     """
-    for _storage_endpoint in storage_endpoints:
-        for _storage_share in _storage_endpoint.storage_shares:
-            _memcached_index = "Ugrstoragestats_" + _storage_share.id
-
-            try:
-                _memcached_contents = memcache.get(
-                    _memcached_index,
-                    args.memcached_ip,
-                    args.memcached_port
-                )
+    _storage_shares = [
+        _storage_share
+        for _storage_endpoint in storage_endpoints
+        for _storage_share in _storage_endpoint.storage_shares
+    ]
+
+    # Obtain every StorageShare's memcached index in a single request.
+    _memcached_contents_by_index = memcache.get_multi(
+        ["Ugrstoragestats_" + _storage_share.id for _storage_share in _storage_shares],
+        args.memcached_ip,
+        args.memcached_port
+    )
 
-            except dynafed_storagestats.exceptions.MemcachedIndexError as ERR:
-                _memcached_contents = 'No content found or error connecting to memcached service.'
-                _storage_share.debug.append("[ERROR]" + ERR.debug)
-
-            print('\n#####', _storage_share.id, '#####'
-                  '\n{0:12}{1}'.format('URL:', _storage_share.uri['url']),
-                  '\n{0:12}{1}'.format('Protocol:', _storage_share.storageprotocol),
-                  '\n{0:12}{1}'.format('Time:', _storage_share.stats['starttime']),
-                  '\n{0:12}{1}'.format('Quota:', _storage_share.stats['quota']),
-                  '\n{0:12}{1}'.format('Bytes Used:', _storage_share.stats['bytesused']),
-                  '\n{0:12}{1}'.format('Bytes Free:', _storage_share.stats['bytesfree']),
-                  '\n{0:12}{1}'.format('FileCount:', _storage_share.stats['filecount']),
-                  '\n{0:12}{1}'.format('Status:', _storage_share.status),
-                  )
-
-            print('\nMemcached:',
-                  '\n{0:12}{1}'.format('Index:', _memcached_index),
-                  '\n{0:12}{1}'.format('Contents:', _memcached_contents),
-                  )
-
-            if args.debug:
-                print('\nDebug:')
-                for _error in _storage_share.debug:
-                    print('{0:12}{1}'.format(' ', _error))
+    for _storage_share in _storage_shares:
+        _memcached_index = "Ugrstoragestats_" + _storage_share.id
+
+        try:
+            _memcached_contents = _memcached_contents_by_index[_memcached_index]
+
+        except KeyError:
+            ERR = dynafed_storagestats.exceptions.MemcachedIndexError()
+            _memcached_contents = 'No content found or error connecting to memcached service.'
+            _storage_share.debug.append("[ERROR]" + ERR.debug)
+
+        print('\n#####', _storage_share.id, '#####'
+              '\n{0:12}{1}'.format('URL:', _storage_share.uri['url']),
+              '\n{0:12}{1}'.format('Protocol:', _storage_share.storageprotocol),
+              '\n{0:12}{1}'.format('Time:', _storage_share.stats['starttime']),
+              '\n{0:12}{1}'.format('Quota:', _storage_share.stats['quota']),
+              '\n{0:12}{1}'.format('Bytes Used:', _storage_share.stats['bytesused']),
+              '\n{0:12}{1}'.format('Bytes Free:', _storage_share.stats['bytesfree']),
+              '\n{0:12}{1}'.format('FileCount:', _storage_share.stats['filecount']),
+              '\n{0:12}{1}'.format('Status:', _storage_share.status),
+              )
+
+        print('\nMemcached:',
+              '\n{0:12}{1}'.format('Index:', _memcached_index),
+              '\n{0:12}{1}'.format('Contents:', _memcached_contents),
+              )
+
+        if args.debug:
+            print('\nDebug:')
+            for _error in _storage_share.debug:
+                print('{0:12}{1}'.format(' ', _error))
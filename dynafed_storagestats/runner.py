@@ -2,7 +2,8 @@
 
 """Runner to gather storage share information."""
 
-from multiprocessing.dummy import Pool as ThreadPool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
 
 import dynafed_storagestats.reports
 from dynafed_storagestats import args
@@ -14,6 +15,17 @@ from dynafed_storagestats import output
 from dynafed_storagestats import __version__
 
 
+####################
+# Module Variables #
+####################
+
+# Creating logger
+_logger = logging.getLogger(__name__)
+
+# Maximum number of threads used to contact storage endpoints concurrently.
+_MAX_THREADS = 32
+
+
 ########
 # Main #
 ########
@@ -110,19 +122,8 @@ def reports(ARGS):
             _storage_shares
         )
 
-        # This tuple is necessary for the starmap function to send multiple
-        # arguments to the process_storagestats function.
-        _storage_endpoints_list_and_args_tuple = [
-            (_storage_endpoint, ARGS) for _storage_endpoint in _storage_endpoints
-        ]
-
         # Process each storage endpoints' shares using multithreading.
-        # Number of threads to use.
-        _pool = ThreadPool(len(_storage_endpoints_list_and_args_tuple))
-        _pool.starmap(
-            helpers.process_filelist_reports,
-            _storage_endpoints_list_and_args_tuple
-        )
+        _run_threaded(helpers.process_filelist_reports, _storage_endpoints, ARGS)
 
     elif ARGS.sub_cmd == 'storage':
         # Check that all required arguments were given.
@@ -166,19 +167,8 @@ def reports(ARGS):
             _storage_shares
         )
 
-        # This tuple is necessary for the starmap function to send multiple
-        # arguments to the process_storagestats function.
-        _storage_endpoints_list_and_args_tuple = [
-            (_storage_endpoint, ARGS) for _storage_endpoint in _storage_endpoints
-        ]
-
         # Process each storage endpoints' shares using multithreading.
-        # Number of threads to use.
-        _pool = ThreadPool(len(_storage_endpoints_list_and_args_tuple))
-        _pool.starmap(
-            helpers.process_storage_reports,
-            _storage_endpoints_list_and_args_tuple
-        )
+        _run_threaded(helpers.process_storage_reports, _storage_endpoints, ARGS)
 
         # Create the requested report
         if ARGS.wlcg:
@@ -234,19 +224,12 @@ def stats(ARGS):
         _storage_shares
     )
 
-    # This tuple is necessary for the starmap function to send multiple
-    # arguments to the process_storagestats function.
-    storage_endpoints_list_and_args_tuple = [
-        (storage_endpoint, ARGS) for storage_endpoint in storage_endpoints
-    ]
-
     # Process each storage endpoints' shares using multithreading.
-    # Number of threads to use.
-    pool = ThreadPool(len(storage_endpoints_list_and_args_tuple))
-    pool.starmap(
-        helpers.process_storagestats,
-        storage_endpoints_list_and_args_tuple
-    )
+    _run_threaded(helpers.process_storagestats, storage_endpoints, ARGS)
+
+    # Upload all StorageEndpoints's StorageShares stats to memcached.
+    if ARGS.output_memcached:
+        helpers.process_storagestats_memcached(storage_endpoints, ARGS)
 
     # Output #
 
@@ -263,6 +246,44 @@ def stats(ARGS):
         output.to_plaintext(storage_endpoints, ARGS.to_plaintext, ARGS.output_path)
 
 
+###########
+# Helpers #
+###########
+
+def _run_threaded(function, storage_endpoints, ARGS):
+    """Call function(storage_endpoint, ARGS) for each endpoint in a thread pool.
+
+    Contacting the storage endpoints is network bound, so each endpoint is
+    handled in its own worker thread, up to _MAX_THREADS at a time. An
+    exception raised for one endpoint is logged and doesn't stop the others.
+
+    Arguments:
+    function -- function taking a StorageEndpoint object and ARGS.
+    storage_endpoints -- list of dynafed_storagestats StorageEndpoint objects.
+    ARGS -- argparse object from dynafed_storagestats.args.parse_args()
+
+    """
+    _threads = max(1, min(_MAX_THREADS, len(storage_endpoints)))
+
+    with ThreadPoolExecutor(max_workers=_threads) as _executor:
+        _futures = {
+            _executor.submit(function, _storage_endpoint, ARGS): _storage_endpoint
+            for _storage_endpoint in storage_endpoints
+        }
+
+        for _future in as_completed(_futures):
+            try:
+                _future.result()
+
+            except Exception as ERR:
+                _logger.error(
+                    "[%s]Unexpected error processing storage endpoint: %s",
+                    _futures[_future].url,
+                    ERR,
+                    exc_info=True
+                )
+
+
 #############
 # Self-Test #
 #############
@@ -2,6 +2,7 @@
 
 import logging
 from urllib.parse import urlsplit
+from types import MappingProxyType
 import sys
 
 import dynafed_storagestats.base
@@ -28,6 +29,43 @@ class S3StorageShare(dynafed_storagestats.base.StorageShare):
 
     """
 
+    validators = MappingProxyType({
+        **dynafed_storagestats.base.StorageShare.validators,
+        's3.alternate': {
+            'boolean': True,
+            'default': False,
+            'required': False,
+            'status_code': '020',
+            'valid': ['true', 'false', 'yes', 'no']
+        },
+        'storagestats.api': {
+            'default': 'generic',
+            'required': False,
+            'status_code': '070',
+            'valid': ['ceph-admin', 'cloudwatch', 'generic', 'list-objects',
+                      'minio_prometheus', 'minio_prometheus_v2'],
+        },
+        's3.priv_key': {
+            'required': True,
+            'status_code': '021',
+        },
+        's3.pub_key': {
+            'required': True,
+            'status_code': '022',
+        },
+        's3.region': {
+            'default': 'us-east-1',
+            'required': False,
+            'status_code': '023',
+        },
+        's3.signature_ver': {
+            'default': 's3v4',
+            'required': False,
+            'status_code': '024',
+            'valid': ['s3', 's3v4'],
+        },
+    })
+
     def __init__(self, *args, **kwargs):
         """Extend StorageShare class attributes."""
         # First we call the super function to initialize the initial attributes
@@ -36,58 +74,23 @@ class S3StorageShare(dynafed_storagestats.base.StorageShare):
 
         self.storageprotocol = "S3"
 
-        self.validators.update({
-            's3.alternate': {
-                'default': 'false',
-                'required': False,
-                'status_code': '020',
-                'valid': ['true', 'false', 'yes', 'no']
-            },
-            'storagestats.api': {
-                'default': 'generic',
-                'required': False,
-                'status_code': '070',
-                'valid': ['ceph-admin', 'cloudwatch', 'generic', 'list-objects',
-                          'minio_prometheus', 'minio_prometheus_v2'],
-            },
-            's3.priv_key': {
-                'required': True,
-                'status_code': '021',
-            },
-            's3.pub_key': {
-                'required': True,
-                'status_code': '022',
-            },
-            's3.region': {
-                'default': 'us-east-1',
-                'required': False,
-                'status_code': '023',
-            },
-            's3.signature_ver': {
-                'default': 's3v4',
-                'required': False,
-                'status_code': '024',
-                'valid': ['s3', 's3v4'],
-            },
-        })
-
         # Invoke the validate_plugin_settings() method
         self.validate_plugin_settings()
 
         # Invoke the validate_schema() method
         self.validate_schema()
 
-        # Obtain bucket name
-        if (
-            self.plugin_settings['s3.alternate'].lower() == 'true'
-            or self.plugin_settings['s3.alternate'].lower() == 'yes'
-        ):
-            self.uri['bucket'] = self.uri['path'].rpartition("/")[-1]
+        # Obtain bucket name, from the path for alternate (path-style) URLs and
+        # from the first label of the host otherwise.
+        if self.plugin_settings['s3.alternate']:
+            self.uri['bucket'] = self.uri['path'].rsplit("/", 1)[-1]
 
         else:
-            self.uri['bucket'], self.uri['domain'] = self.uri['netloc'].partition('.')[::2]
+            _bucket, _, _domain = self.uri['netloc'].partition('.')
+            self.uri['bucket'] = _bucket
+            self.uri['domain'] = _domain
 
-        self.star_fields['storage_share'] = self.uri['bucket']
+        self.star_fields['storageshare'] = self.uri['bucket']
 
     def get_object_checksum(self, hash_type, object_url):
         """Run process to obtain checksum from object's metadata if it exists.
@@ -235,8 +238,10 @@ class S3StorageShare(dynafed_storagestats.base.StorageShare):
     def get_storagestats(self):
         """Contact endpoint using requested method."""
 
+        _api = self.plugin_settings['storagestats.api'].lower()
+
         # Getting the storage stats CephS3's Admin API
-        if self.plugin_settings['storagestats.api'].lower() == 'ceph-admin':
+        if _api == 'ceph-admin':
             s3helpers.ceph_admin(self)
 
         # Getting the storage stats AWS S3 API
@@ -244,22 +249,19 @@ class S3StorageShare(dynafed_storagestats.base.StorageShare):
 
         # Getting the storage stats using AWS-Boto3 list-objects API, should
         # work for any compatible S3 endpoint.
-        elif (
-            self.plugin_settings['storagestats.api'].lower() == 'generic'
-            or self.plugin_settings['storagestats.api'].lower() == 'list-objects'
-        ):
+        elif _api in ('generic', 'list-objects'):
             s3helpers.list_objects(self)
 
         # Getting the storage stats using AWS Cloudwatch
-        elif self.plugin_settings['storagestats.api'].lower() == 'cloudwatch':
+        elif _api == 'cloudwatch':
             s3helpers.cloudwatch(self)
 
         # Getting the storage stats from Minio's Prometheus URL
-        elif self.plugin_settings['storagestats.api'].lower() == 'minio_prometheus':
+        elif _api == 'minio_prometheus':
             s3helpers.minio_prometheus(self)
 
         # Getting the storage stats from Minio's V2 Prometheus cluster URL
-        elif self.plugin_settings['storagestats.api'].lower() == 'minio_prometheus_v2':
+        elif _api == 'minio_prometheus_v2':
             s3helpers.minio_prometheus_v2(self)
 
     def get_filelist(self, delta=1, prefix='', report_file='/tmp/filelist_report.txt'):
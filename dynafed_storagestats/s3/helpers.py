@@ -1,8 +1,14 @@
 """Helper functions used to contact S3 based API's."""
 
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 import datetime
+import itertools
 import logging
+import operator
 import os
+import threading
+import time
 
 import boto3
 import botocore.vendored.requests.exceptions as botoRequestsExceptions
@@ -12,6 +18,7 @@ from botocore.client import Config
 from prometheus_client.parser import text_string_to_metric_families
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests_aws4auth import AWS4Auth
 
 import dynafed_storagestats.exceptions
@@ -26,11 +33,135 @@ import dynafed_storagestats.time
 # Creating logger
 _logger = logging.getLogger(__name__)
 
+# Shared session so connections to the same host are pooled and reused by the
+# non-boto API's (ceph-admin, minio_prometheus). Sized for runner's threads.
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+# Extracts the 'Size' of the objects in a list_objects page. boto already
+# parses it as an integer.
+_GET_SIZE = operator.itemgetter('Size')
+
+# Size of each boto client's connection pool. Clients are shared by all the
+# shares on an endpoint and by the prefix listing threads, so botocore's
+# default of 10 would make them wait for a free connection.
+_BOTO_MAX_POOL_CONNECTIONS = 32
+
+# Buckets with more top level prefixes than this are listed in a single flat
+# pass, as listing each prefix separately would cost more requests than it
+# saves and keep all the prefixes in memory.
+_LIST_OBJECTS_MAX_PREFIXES = 100
+
+# Prefixes are listed by one pool shared by all the endpoints, so the number
+# of concurrent listings stays bounded however many endpoints are checked.
+# It is half the boto connection pool so even if they all use the same client
+# there are connections left for its other requests.
+_LIST_OBJECTS_THREADS = _BOTO_MAX_POOL_CONNECTIONS // 2
+_LIST_OBJECTS_EXECUTOR = ThreadPoolExecutor(
+    max_workers=_LIST_OBJECTS_THREADS,
+    thread_name_prefix='list_objects',
+)
+
+# botocore retry mode and number of retries after the first request. The
+# "standard" mode retries throttling, transient 5xx and connection errors with
+# exponential backoff, so one of them doesn't abort a listing of many pages.
+_BOTO_RETRY_MODE = 'standard'
+_BOTO_MAX_RETRIES = 2
+
+# Single boto session used to create all the clients, so the service models
+# and endpoint data are only loaded once.
+_BOTO_SESSION = boto3.session.Session()
+_BOTO_SESSION_LOCK = threading.Lock()
+
+# Cloudwatch boto clients keyed by the settings used to create them.
+_CLOUDWATCH_CLIENTS = {}
+
+# S3 boto clients keyed by endpoint URL and the settings used to create them.
+_S3_CLIENTS = {}
+
 
 ##############
 # Functions #
 ##############
 
+def _sum_objects(boto_client, bucket, prefix):
+    """Return the total size and number of the objects under a prefix.
+
+    Arguments:
+    boto_client -- boto3 S3 client object.
+    bucket -- string with the bucket name.
+    prefix -- string.
+
+    Returns:
+    Tuple with the total bytes and the number of objects.
+
+    """
+
+    _total_bytes = 0
+    _total_files = 0
+
+    _kwargs = {
+        'Bucket': bucket,
+        'Prefix': prefix,
+        'PaginationConfig': {'PageSize': 1000},
+    }
+
+    for _page in run_boto_paginator(boto_client, 'list_objects', _kwargs):
+        _contents = _page.get('Contents', ())
+        _total_bytes += sum(map(_GET_SIZE, _contents))
+        _total_files += len(_contents)
+
+    return _total_bytes, _total_files
+
+
+@contextlib.contextmanager
+def _translate_boto_errors():
+    """Re-raise boto/botocore exceptions as our own ConnectionError.
+
+    Shared by run_boto_client() and run_boto_paginator().
+
+    """
+
+    try:
+        yield
+
+    except botoExceptions.ClientError as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code=ERR.response['ResponseMetadata']['HTTPStatusCode'],
+            debug=str(ERR),
+        )
+
+    except botoRequestsExceptions.SSLError as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code="092",
+            debug=str(ERR),
+        )
+
+    except botoRequestsExceptions.RequestException as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code="400",
+            debug=str(ERR),
+        )
+
+    except botoExceptions.ParamValidationError as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code="095",
+            debug=str(ERR),
+        )
+
+    except botoExceptions.BotoCoreError as ERR:
+        raise dynafed_storagestats.exceptions.ConnectionError(
+            error=ERR.__class__.__name__,
+            status_code="400",
+            debug=str(ERR),
+        )
+
+
 def ceph_admin(storage_share):
     """Contact S3 endpoint using Ceph's Admin API.
 
@@ -45,11 +176,7 @@ def ceph_admin(storage_share):
     """
 
     # Generate the API's URL to contact.
-    if (
-        storage_share.plugin_settings['s3.alternate'].lower() == 'true'
-        or storage_share.plugin_settings['s3.alternate'].lower() == 'yes'
-    ):
-
+    if storage_share.plugin_settings['s3.alternate']:
         _api_url = '{scheme}://{netloc}/admin/bucket?format=json'.format(
             scheme=storage_share.uri['scheme'],
             netloc=storage_share.uri['netloc']
@@ -80,7 +207,7 @@ def ceph_admin(storage_share):
         "[%s]Requesting storage stats with: URN: %s API Method: %s Payload: %s",
         storage_share.id,
         _api_url,
-        storage_share.plugin_settings['storagestats.api'].lower(),
+        storage_share.plugin_settings['storagestats.api'],
         _payload
     )
 
@@ -89,7 +216,7 @@ def ceph_admin(storage_share):
     _response = False
 
     try:
-        _response = requests.request(
+        _response = _SESSION.request(
             method="GET",
             url=_api_url,
             params=_payload,
@@ -99,14 +226,15 @@ def ceph_admin(storage_share):
         )
 
         # Save time when data was obtained.
-        storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+        storage_share.stats['endtime'] = int(time.time())
 
         # Log contents of response
-        _logger.debug(
-            "[%s]Endpoint reply: %s",
-            storage_share.id,
-            _response.text
-        )
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "[%s]Endpoint reply: %s",
+                storage_share.id,
+                _response.text
+            )
 
     except requests.exceptions.InvalidSchema as ERR:
         raise dynafed_storagestats.exceptions.ConnectionErrorInvalidSchema(
@@ -120,7 +248,7 @@ def ceph_admin(storage_share):
         # a global setting is incorrectly giving the wrong
         # ca's to check against.
         try:
-            _response = requests.request(
+            _response = _SESSION.request(
                 method="GET",
                 url=_api_url,
                 params=_payload,
@@ -130,14 +258,15 @@ def ceph_admin(storage_share):
             )
 
             # Save time when data was obtained.
-            storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+            storage_share.stats['endtime'] = int(time.time())
 
             # Log contents of response
-            _logger.debug(
-                "[%s]Endpoint reply: %s",
-                storage_share.id,
-                _response.text
-            )
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(
+                    "[%s]Endpoint reply: %s",
+                    storage_share.id,
+                    _response.text
+                )
 
         except requests.exceptions.SSLError as ERR:
             raise dynafed_storagestats.exceptions.ConnectionError(
@@ -281,7 +410,7 @@ def cloudwatch(storage_share):
     _logger.debug(
         "[%s]Requesting storage stats with: API Method: %s",
         storage_share.id,
-        storage_share.plugin_settings['storagestats.api'].lower(),
+        storage_share.plugin_settings['storagestats.api'],
     )
 
     # Requesting the information for each defined metric.
@@ -345,6 +474,19 @@ def cloudwatch(storage_share):
                 _metric,
                 _response
             )
+            # Without datapoints (e.g. metrics not published yet for the
+            # bucket) fall back to listing the objects.
+            if not _response['Datapoints']:
+                WARN = dynafed_storagestats.exceptions.CloudwatchNoDatapointsWarning(
+                    metric=_metric,
+                )
+                _logger.warning("[%s]%s", storage_share.id, WARN.debug)
+                storage_share.debug.append("[WARNING]" + WARN.debug)
+                storage_share.status.append("[WARNING]" + WARN.error_code)
+
+                list_objects(storage_share)
+                return
+
             # Extract the metric value from the response.
             _metrics[_metric]['Result'] = \
                 _response['Datapoints'][0][
@@ -352,7 +494,7 @@ def cloudwatch(storage_share):
                 ]
 
     # Save the timestamp when data was obtained.
-    storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+    storage_share.stats['endtime'] = int(time.time())
 
     # Save metrics to storage_share.
     storage_share.stats['bytesused'] = int(_metrics['BucketSizeBytes']['Result'])
@@ -374,7 +516,9 @@ def cloudwatch(storage_share):
 
 
 def get_cloudwatch_boto_client(storage_share):
-    """Generate unique session Cloudwatch boto client from storage share object.
+    """Return Cloudwatch boto client for storage share, creating it if needed.
+
+    Clients are cached by the settings used to build them, like the S3 ones.
 
     Arguments:
     storage_share -- dynafed_storagestats StorageShare object.
@@ -383,30 +527,49 @@ def get_cloudwatch_boto_client(storage_share):
     botocore.client.cloudwatch
 
     """
+    _settings = storage_share.plugin_settings
+
+    _client_key = (
+        _settings['s3.region'],
+        _settings['s3.pub_key'],
+        _settings['s3.priv_key'],
+        _settings['s3.signature_ver'],
+        _settings['conn_timeout'],
+    )
+
+    try:
+        return _CLOUDWATCH_CLIENTS[_client_key]
 
-    # Generate a new session. Needed when running in multithreading.
-    _session = boto3.session.Session()
+    except KeyError:
+        pass
 
     # Generate boto client to query AWS API.
-    _connection = _session.client(
-        'cloudwatch',
-        region_name=storage_share.plugin_settings['s3.region'],
-        aws_access_key_id=storage_share.plugin_settings['s3.pub_key'],
-        aws_secret_access_key=storage_share.plugin_settings['s3.priv_key'],
-        use_ssl=True,
-        verify=True,
-        config=Config(
-            signature_version=storage_share.plugin_settings['s3.signature_ver'],
-            connect_timeout=int(storage_share.plugin_settings['conn_timeout']),
-            retries=dict(max_attempts=0)
-        ),
-    )
+    # Sessions aren't thread-safe, so clients are created one at a time.
+    with _BOTO_SESSION_LOCK:
+        _connection = _BOTO_SESSION.client(
+            'cloudwatch',
+            region_name=_settings['s3.region'],
+            aws_access_key_id=_settings['s3.pub_key'],
+            aws_secret_access_key=_settings['s3.priv_key'],
+            use_ssl=True,
+            verify=True,
+            config=Config(
+                signature_version=_settings['s3.signature_ver'],
+                connect_timeout=int(_settings['conn_timeout']),
+                max_pool_connections=_BOTO_MAX_POOL_CONNECTIONS,
+                retries=dict(mode=_BOTO_RETRY_MODE, max_attempts=_BOTO_MAX_RETRIES)
+            ),
+        )
 
-    return _connection
+    return _CLOUDWATCH_CLIENTS.setdefault(_client_key, _connection)
 
 
 def get_s3_boto_client(storage_share):
-    """Generate unique session S3 boto client from storage share object.
+    """Return S3 boto client for storage share object, creating it if needed.
+
+    Clients are cached by endpoint URL and the settings used to build them, so
+    shares on the same endpoint reuse one client and its connection pool.
+    boto3 clients are thread-safe once created.
 
     Arguments:
     storage_share -- dynafed_storagestats StorageShare object.
@@ -415,12 +578,10 @@ def get_s3_boto_client(storage_share):
     botocore.client.S3
 
     """
-    # Generate the API's URL to contact.
-    if (
-        storage_share.plugin_settings['s3.alternate'].lower() == 'true'
-        or storage_share.plugin_settings['s3.alternate'].lower() == 'yes'
-    ):
+    _settings = storage_share.plugin_settings
 
+    # Generate the API's URL to contact.
+    if _settings['s3.alternate']:
         _api_url = '{scheme}://{netloc}'.format(
             scheme=storage_share.uri['scheme'],
             netloc=storage_share.uri['netloc']
@@ -432,26 +593,42 @@ def get_s3_boto_client(storage_share):
             domain=storage_share.uri['domain']
         )
 
-    # Generate a new session. Needed when running in multithreading.
-    _session = boto3.session.Session()
+    _client_key = (
+        _api_url,
+        _settings['s3.region'],
+        _settings['s3.pub_key'],
+        _settings['s3.priv_key'],
+        _settings['s3.signature_ver'],
+        _settings['ssl_check'],
+        _settings['conn_timeout'],
+    )
+
+    try:
+        return _S3_CLIENTS[_client_key]
+
+    except KeyError:
+        pass
 
     # Generate boto client to query S3 endpoint.
-    _connection = _session.client(
-        's3',
-        region_name=storage_share.plugin_settings['s3.region'],
-        endpoint_url=_api_url,
-        aws_access_key_id=storage_share.plugin_settings['s3.pub_key'],
-        aws_secret_access_key=storage_share.plugin_settings['s3.priv_key'],
-        use_ssl=True,
-        verify=storage_share.plugin_settings['ssl_check'],
-        config=Config(
-            signature_version=storage_share.plugin_settings['s3.signature_ver'],
-            connect_timeout=int(storage_share.plugin_settings['conn_timeout']),
-            retries=dict(max_attempts=0)
-        ),
-    )
+    # Sessions aren't thread-safe, so clients are created one at a time.
+    with _BOTO_SESSION_LOCK:
+        _connection = _BOTO_SESSION.client(
+            's3',
+            region_name=_settings['s3.region'],
+            endpoint_url=_api_url,
+            aws_access_key_id=_settings['s3.pub_key'],
+            aws_secret_access_key=_settings['s3.priv_key'],
+            use_ssl=True,
+            verify=_settings['ssl_check'],
+            config=Config(
+                signature_version=_settings['s3.signature_ver'],
+                connect_timeout=int(_settings['conn_timeout']),
+                max_pool_connections=_BOTO_MAX_POOL_CONNECTIONS,
+                retries=dict(mode=_BOTO_RETRY_MODE, max_attempts=_BOTO_MAX_RETRIES)
+            ),
+        )
 
-    return _connection
+    return _S3_CLIENTS.setdefault(_client_key, _connection)
 
 
 def list_objects(storage_share, delta=1, prefix='',
@@ -477,86 +654,95 @@ def list_objects(storage_share, delta=1, prefix='',
     _total_bytes = 0
     _total_files = 0
 
-    # We define the arguments for the API call. Delimiter is set to *
-    # to get all keys. This is necessary for AWS to return the "NextMarker"
-    # attribute necessary to iterate when there are > 1,000 objects.
+    # We define the arguments for the API call. The API can only serve 1,000
+    # objects per request; the boto paginator follows the "NextMarker" (or
+    # the last key when the endpoint doesn't send it) to get the next page.
+    # We keep list_objects (v1) as CephS3 doesn't support list_objects_v2's
+    # "NextContinuationToken".
     _kwargs = {
         'Bucket': storage_share.uri['bucket'],
-        'Delimiter': '*',
         'Prefix': prefix,
+        'PaginationConfig': {'PageSize': 1000},
     }
 
-    # _logger.debug(
-    #     "[%s]Requesting storage stats with: URN: %s API Method: %s Payload: %s",
-    #     storage_share.id,
-    #     _connection._endpoint,
-    #     storage_share.plugin_settings['storagestats.api'].lower(),
-    #     _kwargs
-    # )
-
-    # This loop is needed to obtain all objects as the API can only
-    # server 1,000 objects per request. The 'NextMarker' tells where
-    # to start the next 1,000. If no 'NextMarker' is received, all
-    # objects have been obtained.
-    while True:
-        _logger.info(
-            '[%s]Executing boto client method "%s"',
-            storage_share.id,
-            'list_objects'
-        )
-        _logger.debug(
-            '[%s]Boto client arguments: %s',
-            storage_share.id,
-            _kwargs
-        )
+    # For the storage stats the top level is listed with a '/' delimiter, and
+    # the "sub-directories" returned as CommonPrefixes are then summed
+    # concurrently instead of paging through the whole bucket one request
+    # at a time. Too many prefixes fall back to a single flat listing.
+    if request == 'storagestats':
+        _kwargs['Delimiter'] = '/'
 
-        _response = run_boto_client(_connection, 'list_objects', _kwargs)
+    _logger.info(
+        '[%s]Executing boto client method "%s"',
+        storage_share.id,
+        'list_objects'
+    )
+    _logger.debug(
+        '[%s]Boto client arguments: %s',
+        storage_share.id,
+        _kwargs
+    )
+
+    _common_prefixes = []
 
-        # This outputs a lot of information, might not be necessary.
-        # _logger.debug(
-        #     "[%s]Endpoint reply: %s",
-        #     storage_share.id,
-        #     response['Contents']
-        # )
+    for _page in run_boto_paginator(_connection, 'list_objects', _kwargs):
+        # Pages without objects don't have the 'Contents' key.
+        _contents = _page.get('Contents', ())
 
         # Check what type of request is asked being used.
         if request == 'storagestats':
-            try:
-                # Make sure we got a list of objects.
-                _response['Contents']
-            except KeyError:
-                storage_share.stats['bytesused'] = 0
+            _total_bytes += sum(map(_GET_SIZE, _contents))
+            _total_files += len(_contents)
+            _common_prefixes.extend(
+                _common_prefix['Prefix'] for _common_prefix in _page.get('CommonPrefixes', ())
+            )
+
+            if len(_common_prefixes) > _LIST_OBJECTS_MAX_PREFIXES:
                 break
-            else:
-                for _file in _response['Contents']:
-                    _total_bytes += int(_file['Size'])
-                    _total_files += 1
 
         elif request == 'filelist':
-            try:
-                # Make sure we got a list of objects.
-                _response['Contents']
-            except KeyError:
-                break
-            else:
-                for _file in _response['Contents']:
-                    # Output files older than the specified delta.
-                    if dynafed_storagestats.time.mask_timestamp_by_delta(_file['LastModified'], delta):
-                        # Remove the prefix:
-                        _filepath = os.path.relpath(_file['Key'], prefix)
-                        # Write to file
-                        report_file.write("%s\n" % _filepath)
-                        # File counter
-                        _total_files += 1
-
-        # Exit if no "NextMarker" as list is now over.
-        try:
-            _kwargs['Marker'] = _response['NextMarker']
-        except KeyError:
-            break
+            for _file in _contents:
+                # Output files older than the specified delta.
+                if dynafed_storagestats.time.mask_timestamp_by_delta(_file['LastModified'], delta):
+                    # Remove the prefix:
+                    _filepath = os.path.relpath(_file['Key'], prefix)
+                    # Write to file
+                    report_file.write("%s\n" % _filepath)
+                    # File counter
+                    _total_files += 1
+
+    if len(_common_prefixes) > _LIST_OBJECTS_MAX_PREFIXES:
+        _logger.info(
+            '[%s]More than %s prefixes found, listing all objects in one pass.',
+            storage_share.id,
+            _LIST_OBJECTS_MAX_PREFIXES
+        )
+
+        _total_bytes, _total_files = _sum_objects(
+            _connection,
+            storage_share.uri['bucket'],
+            prefix
+        )
+
+    elif _common_prefixes:
+        _logger.debug(
+            '[%s]Listing %s prefixes concurrently: %s',
+            storage_share.id,
+            len(_common_prefixes),
+            _common_prefixes
+        )
+
+        for _prefix_bytes, _prefix_files in _LIST_OBJECTS_EXECUTOR.map(
+                _sum_objects,
+                itertools.repeat(_connection),
+                itertools.repeat(storage_share.uri['bucket']),
+                _common_prefixes
+        ):
+            _total_bytes += _prefix_bytes
+            _total_files += _prefix_files
 
     # Save time when data was obtained.
-    storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+    storage_share.stats['endtime'] = int(time.time())
 
     # Process the result for the storage stats.
     if request == 'storagestats':
@@ -609,7 +795,7 @@ def minio_prometheus(storage_share):
     _response = False
 
     try:
-        _response = requests.request(
+        _response = _SESSION.request(
             method="GET",
             url=_api_url,
             verify=storage_share.plugin_settings['ssl_check'],
@@ -617,14 +803,15 @@ def minio_prometheus(storage_share):
         )
 
         # Save time when data was obtained.
-        storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+        storage_share.stats['endtime'] = int(time.time())
 
         # Log contents of response
-        _logger.debug(
-            "[%s]Endpoint reply: %s",
-            storage_share.id,
-            _response.text
-        )
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "[%s]Endpoint reply: %s",
+                storage_share.id,
+                _response.text
+            )
 
     except requests.exceptions.InvalidSchema as ERR:
         raise dynafed_storagestats.exceptions.ConnectionErrorInvalidSchema(
@@ -638,7 +825,7 @@ def minio_prometheus(storage_share):
         # a global setting is incorrectly giving the wrong
         # ca's to check against.
         try:
-            _response = requests.request(
+            _response = _SESSION.request(
                 method="GET",
                 url=_api_url,
                 verify=storage_share.plugin_settings['ssl_check'],
@@ -646,14 +833,15 @@ def minio_prometheus(storage_share):
             )
 
             # Save time when data was obtained.
-            storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+            storage_share.stats['endtime'] = int(time.time())
 
             # Log contents of response
-            _logger.debug(
-                "[%s]Endpoint reply: %s",
-                storage_share.id,
-                _response.text
-            )
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(
+                    "[%s]Endpoint reply: %s",
+                    storage_share.id,
+                    _response.text
+                )
 
         except requests.exceptions.SSLError as ERR:
             raise dynafed_storagestats.exceptions.ConnectionError(
@@ -734,7 +922,7 @@ def minio_prometheus_v2(storage_share):
     _response = False
 
     try:
-        _response = requests.request(
+        _response = _SESSION.request(
             method="GET",
             url=_api_url,
             verify=storage_share.plugin_settings['ssl_check'],
@@ -742,14 +930,15 @@ def minio_prometheus_v2(storage_share):
         )
 
         # Save time when data was obtained.
-        storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+        storage_share.stats['endtime'] = int(time.time())
 
         # Log contents of response
-        _logger.debug(
-            "[%s]Endpoint reply: %s",
-            storage_share.id,
-            _response.text
-        )
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "[%s]Endpoint reply: %s",
+                storage_share.id,
+                _response.text
+            )
 
     except requests.exceptions.InvalidSchema as ERR:
         raise dynafed_storagestats.exceptions.ConnectionErrorInvalidSchema(
@@ -763,7 +952,7 @@ def minio_prometheus_v2(storage_share):
         # a global setting is incorrectly giving the wrong
         # ca's to check against.
         try:
-            _response = requests.request(
+            _response = _SESSION.request(
                 method="GET",
                 url=_api_url,
                 verify=storage_share.plugin_settings['ssl_check'],
@@ -771,14 +960,15 @@ def minio_prometheus_v2(storage_share):
             )
 
             # Save time when data was obtained.
-            storage_share.stats['endtime'] = int(datetime.datetime.now().timestamp())
+            storage_share.stats['endtime'] = int(time.time())
 
             # Log contents of response
-            _logger.debug(
-                "[%s]Endpoint reply: %s",
-                storage_share.id,
-                _response.text
-            )
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(
+                    "[%s]Endpoint reply: %s",
+                    storage_share.id,
+                    _response.text
+                )
 
         except requests.exceptions.SSLError as ERR:
             raise dynafed_storagestats.exceptions.ConnectionError(
@@ -846,46 +1036,31 @@ def run_boto_client(boto_client, method, kwargs):
 
     _function = getattr(boto_client, method)
 
-    try:
-        result = _function(**kwargs)
+    with _translate_boto_errors():
+        return _function(**kwargs)
 
-    except botoExceptions.ClientError as ERR:
-        raise dynafed_storagestats.exceptions.ConnectionError(
-            error=ERR.__class__.__name__,
-            status_code=ERR.response['ResponseMetadata']['HTTPStatusCode'],
-            debug=str(ERR),
-        )
 
-    except botoRequestsExceptions.SSLError as ERR:
-        raise dynafed_storagestats.exceptions.ConnectionError(
-            error=ERR.__class__.__name__,
-            status_code="092",
-            debug=str(ERR),
-        )
+def run_boto_paginator(boto_client, method, kwargs):
+    """Contact S3 endpoint using the boto paginator for the passed method.
 
-    except botoRequestsExceptions.RequestException as ERR:
-        raise dynafed_storagestats.exceptions.ConnectionError(
-            error=ERR.__class__.__name__,
-            status_code="400",
-            debug=str(ERR),
-        )
+    Boto deals with the markers/tokens needed to request the next page, so
+    pages can be consumed one at a time without keeping the previous ones.
 
-    except botoExceptions.ParamValidationError as ERR:
-        raise dynafed_storagestats.exceptions.ConnectionError(
-            error=ERR.__class__.__name__,
-            status_code="095",
-            debug=str(ERR),
-        )
+    Arguments:
+    boto_client -- boto3 client object.
+    method -- string with the name of a paginated boto client method.
+    kwargs -- dict with the arguments for the method, PaginationConfig included.
 
-    except botoExceptions.BotoCoreError as ERR:
-        raise dynafed_storagestats.exceptions.ConnectionError(
-            error=ERR.__class__.__name__,
-            status_code="400",
-            debug=str(ERR),
-        )
+    Yields:
+    Dict containing each page of the reply from S3 endpoint.
 
-    else:
-        return result
+    """
+
+    _paginator = boto_client.get_paginator(method)
+
+    with _translate_boto_errors():
+        for _page in _paginator.paginate(**kwargs):
+            yield _page
 
 # def ():
 #     """
@@ -1,3 +1,2 @@
 #!/usr/bin/env python3
-# -*- coding: UTF-8 -*-
 __version__ = "1.0.40"
@@ -1,9 +1,8 @@
 """Functions to deal with the formatting and handling  of XML data."""
 
-import copy
-import datetime
+import functools
+import itertools
 import time
-
 import uuid
 
 from io import BytesIO
@@ -12,19 +11,130 @@ from lxml import etree
 import dynafed_storagestats.exceptions
 
 
+####################
+# Module Variables #
+####################
+
+# Number of getcontentlength values converted and summed at a time.
+_CONTENTLENGTH_BATCH_SIZE = 10000
+
+# StAR recordIds are made unique by a random per-process prefix and a counter.
+_RECORD_ID_PREFIX = uuid.uuid4().hex
+_RECORD_ID_COUNTER = itertools.count()
+
+# StAR namespace and the namespaced tag and attribute names used in records.
+_SR_NAMESPACE = "http://eu-emi.eu/namespaces/2011/02/storagerecord"
+_SR_NSMAP = {"sr": _SR_NAMESPACE}
+_SR_STORAGE_USAGE_RECORDS = "{%s}StorageUsageRecords" % _SR_NAMESPACE
+_SR_STORAGE_USAGE_RECORD = "{%s}StorageUsageRecord" % _SR_NAMESPACE
+_SR_RECORD_IDENTITY = "{%s}RecordIdentity" % _SR_NAMESPACE
+_SR_CREATE_TIME = "{%s}createTime" % _SR_NAMESPACE
+_SR_RECORD_ID = "{%s}recordId" % _SR_NAMESPACE
+_SR_STORAGE_SHARE = "{%s}StorageShare" % _SR_NAMESPACE
+_SR_STORAGE_SYSTEM = "{%s}StorageSystem" % _SR_NAMESPACE
+_SR_START_TIME = "{%s}StartTime" % _SR_NAMESPACE
+_SR_END_TIME = "{%s}EndTime" % _SR_NAMESPACE
+_SR_FILE_COUNT = "{%s}FileCount" % _SR_NAMESPACE
+_SR_RESOURCE_CAPACITY_USED = "{%s}ResourceCapacityUsed" % _SR_NAMESPACE
+_SR_RESOURCE_CAPACITY_ALLOCATED = "{%s}ResourceCapacityAllocated" % _SR_NAMESPACE
+
+# Namespaced tags of the two quota properties in an RFC4331 response.
+_DAV_QUOTA_AVAILABLE_BYTES = "{DAV:}quota-available-bytes"
+_DAV_QUOTA_USED_BYTES = "{DAV:}quota-used-bytes"
+
+
+############
+# Classes ##
+############
+
+class _EmptyBodyTracker():
+    """File-like wrapper recording whether a stream had any non-blank data.
+
+    Lets a parse error on a body that was empty, or only whitespace, be told
+    apart from one on a malformed body, whatever its transfer or content
+    encoding.
+
+    """
+
+    def __init__(self, content):
+        """Wrap the file-like object content.
+
+        Arguments:
+        content -- file-like object to read from.
+
+        """
+        self.content = content
+        self.empty = True
+
+
+    def read(self, size=-1):
+        """Read from the wrapped object, noting any non-blank data."""
+        _data = self.content.read(size)
+
+        if self.empty and _data.strip():
+            self.empty = False
+
+        return _data
+
+
 #############
 # Functions #
 #############
 
+@functools.lru_cache(maxsize=4096)
+def _format_iso8601(timestamp):
+    """Return the EPOCH timestamp given as a UTC "YYYY-MM-DDThh:mm:ssZ" string.
+
+    Formats the time.gmtime() fields directly, which is cheaper than
+    time.strftime(). Results are cached as shares polled in the same run
+    tend to share start and end times.
+
+    Arguments:
+    timestamp -- integer, EPOCH.
+
+    Returns:
+    String with the timestamp in ISO 8601 format.
+
+    """
+
+    _time = time.gmtime(timestamp)
+
+    return "%04d-%02d-%02dT%02d:%02d:%02dZ" % (
+        _time.tm_year, _time.tm_mon, _time.tm_mday,
+        _time.tm_hour, _time.tm_min, _time.tm_sec,
+    )
+
+
+def _write_star_field(xf, indent, tag, text=None, attrib=None):
+    """Write a single StAR record field to an lxml xmlfile.
+
+    Arguments:
+    xf -- lxml.etree.xmlfile context the record is being written to.
+    indent -- string written before the field, empty unless pretty printing.
+    tag -- string, field's tag name including namespace.
+    text -- string, field's value if any.
+    attrib -- dict of the field's attributes if any.
+
+    """
+
+    if indent:
+        xf.write(indent)
+
+    with xf.element(tag, attrib or {}):
+        if text is not None:
+            xf.write(text)
+
+
 def add_xml_getcontentlength(content):
-    """Sum contentlength attribute of all files in content string.
+    """Sum contentlength attribute of all files in content stream.
 
     Iterates and sums through all the "contentlength sub-elements" returning the
-    total byte count.
+    total byte count. The XML is parsed incrementally so the whole document
+    is never held in memory. An empty body counts as no files.
 
     Arguments:
-    content -- string containing endpoint's response in XML format. Generated by
-               functions in dynafed_storagestats.dav.helpers.
+    content -- file-like object containing endpoint's response in XML format.
+               Generated by functions in dynafed_storagestats.dav.helpers.
 
     Returns:
     _bytesused -- int representing sum of all files' sizes.
@@ -32,23 +142,74 @@ def add_xml_getcontentlength(content):
 
     """
 
-    _xml = etree.fromstring(content)
     _bytesused = 0
     _filecount = 0
-
-    for _tags in _xml.iter('{DAV:}getcontentlength'):
-        if isinstance(_tags.text, str):
-            _bytesused += int(_tags.text)
-            _filecount += 1
+    _lengths = []
+    _content = _EmptyBodyTracker(content)
+
+    try:
+        for _event, _tag in etree.iterparse(
+            _content,
+            events=('end',),
+            tag=('{DAV:}getcontentlength', '{DAV:}response'),
+        ):
+            if _tag.tag == '{DAV:}getcontentlength':
+                if isinstance(_tag.text, str):
+                    _lengths.append(_tag.text)
+
+                    # Convert and sum in batches with map() and sum() rather
+                    # than one value at a time, keeping the list bounded.
+                    if len(_lengths) >= _CONTENTLENGTH_BATCH_SIZE:
+                        _bytesused += sum(map(int, _lengths))
+                        _filecount += len(_lengths)
+                        _lengths.clear()
+
+            else:
+                # Free each completed response, and the ones before it that
+                # are still attached to the root, so the tree never grows.
+                _tag.clear()
+                while _tag.getprevious() is not None:
+                    del _tag.getparent()[0]
+
+    except etree.XMLSyntaxError:
+        # An empty body means there was nothing to list. Endpoints sending it
+        # chunked or compressed have no "Content-Length: 0" to check first.
+        if _content.empty:
+            return (0, 0)
+
+        raise
+
+    _bytesused += sum(map(int, _lengths))
+    _filecount += len(_lengths)
 
     return (_bytesused, _filecount)
 
 
+@functools.lru_cache(maxsize=None)
+def create_getcontentlength_request():
+    """Create XML PROPFIND request for the getcontentlength property only.
+
+    Used when listing files so the server does not return every property
+    for every resource, which keeps the response small.
+
+    Returns:
+    String in XML format.
+
+    """
+
+    _root = etree.Element("propfind", xmlns="DAV:")
+    _prop = etree.SubElement(_root, "prop")
+    etree.SubElement(_prop, "getcontentlength")
+
+    return etree.tostring(_root, xml_declaration=True, encoding='UTF-8')
+
+
+@functools.lru_cache(maxsize=None)
 def create_rfc4331_request():
     """Create XML RFC4331 request.
 
     Creates an XML for requesting quota and free space on remote WebDAV server.
-    For more information:
+    The body never changes, so it is only built once. For more information:
     https://tools.ietf.org/html/rfc4331
 
     Returns:
@@ -60,14 +221,11 @@ def create_rfc4331_request():
     _prop = etree.SubElement(_root, "prop")
     etree.SubElement(_prop, "quota-available-bytes")
     etree.SubElement(_prop, "quota-used-bytes")
-    _tree = etree.ElementTree(_root)
-    _buff = BytesIO()
-    _tree.write(_buff, xml_declaration=True, encoding='UTF-8')
 
-    return _buff.getvalue()
+    return etree.tostring(_root, xml_declaration=True, encoding='UTF-8')
 
 
-def format_StAR(storage_endpoints):
+def format_StAR(storage_endpoints, pretty=False, *, skip_empty=False):
     """Create XML file representing Dynafed site storage stats in StAR format.
 
     Creates XML object with storage stats in the StAR format.
@@ -75,117 +233,95 @@ def format_StAR(storage_endpoints):
     http://svnweb.cern.ch/world/wsvn/lcgdm/lcg-dm/trunk/scripts/StAR-accounting/star-accounting.py
 
     Arguments:
-    storage_endpoints -- List of dynafed_storagestats StorageEndpoint objects.
+    storage_endpoints -- Iterable of dynafed_storagestats StorageEndpoint objects.
+    pretty -- boolean. Indent the records, useful for debugging.
+    skip_empty -- boolean. Leave out shares reporting no files and no used
+                  space.
 
-    Returns:
-    String in XML format.
+    Yields:
+    Bytes, consecutive chunks of the UTF-8 encoded XML document, one per
+    record plus the document's head and tail.
 
     """
-    SR_namespace = "http://eu-emi.eu/namespaces/2011/02/storagerecord"
-    SR = "{%s}" % SR_namespace
-    NSMAP = {"sr": SR_namespace}
-    xmlroot = etree.Element(SR + "StorageUsageRecords", nsmap=NSMAP)
-
-    for endpoint in storage_endpoints:
-        for share in endpoint.storage_shares:
-            data = etree.Element(SR + "StorageUsageRecords", nsmap=NSMAP)
-
-            # update XML
-            rec = etree.SubElement(xmlroot, SR + 'StorageUsageRecord')
-            rid = etree.SubElement(rec, SR + 'RecordIdentity')
-            rid.set(SR + "createTime", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(datetime.datetime.now().timestamp())))
-
-            # StAR StorageShare field (Optional)
-            if share.star_fields['storage_share']:
-                sshare = etree.SubElement(rec, SR + "StorageShare")
-                sshare.text = share.star_fields['storageshare']
-
-            # StAR StorageSystem field (Required)
-            if share.uri['hostname']:
-                ssys = etree.SubElement(rec, SR + "StorageSystem")
-                ssys.text = share.uri['hostname']
-
-            # StAR recordID field (Required)
-            recid = share.id + "-" + str(uuid.uuid1())
-            rid.set(SR + "recordId", recid)
-
-        #    subjid = etree.SubElement(rec, SR + 'SubjectIdentity')
-
-        #    if endpoint.group:
-        #      grouproles = endpoint.group.split('/')
-        #      # If the last token is Role=... then we fetch the role and add it to the record
-        #    tmprl = grouproles[-1]
-        #    if tmprl.find('Role=') != -1:
-        #      splitroles = tmprl.split('=')
-        #      if (len(splitroles) > 1):
-        #        role = splitroles[1]
-        #        grp = etree.SubElement(subjid, SR + "GroupAttribute" )
-        #        grp.set( SR + "attributeType", "role" )
-        #        grp.text = role
-        #      # Now drop this last token, what remains is the vo identifier
-        #      grouproles.pop()
-        #
-        #    # The voname is the first token
-        #    voname = grouproles.pop(0)
-        #    grp = etree.SubElement(subjid, SR + "Group")
-        #    grp.text = voname
-        #
-        #    # If there are other tokens, they are a subgroup
-        #    if len(grouproles) > 0:
-        #      subgrp = '/'.join(grouproles)
-        #      grp = etree.SubElement(subjid, SR + "GroupAttribute" )
-        #      grp.set( SR + "attributeType", "subgroup" )
-        #      grp.text = subgrp
-        #
-        #    if endpoint.user:
-        #      usr = etree.SubElement(subjid, SR + "User")
-        #      usr.text = endpoint.user
-
-            # StAR Site field (Optional)
-            ## Review
-            # if endpoint.site:
-            #     st = etree.SubElement(subjid, SR + "Site")
-            #     st.text = endpoint.site
-
-            # StAR StorageMedia field (Optional)
-            # too many e vars here below, wtf?
-            ## Review
-            # if endpoint.storagemedia:
-            #     e = etree.SubElement(rec, SR + "StorageMedia")
-            #     e.text = endpoint.storagemedia
-
-            # StAR StartTime field (Required)
-            e = etree.SubElement(rec, SR + "StartTime")
-            e.text = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(share.stats['starttime']))
-
-            # StAR EndTime field (Required)
-            e = etree.SubElement(rec, SR + "EndTime")
-            e.text = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(share.stats['endtime']))
-
-            # StAR FileCount field (Optional)
-            if share.stats['filecount']:
-                e = etree.SubElement(rec, SR + "FileCount")
-                e.text = str(share.stats['filecount'])
-
-            # StAR ResourceCapacityUsed (Required)
-            e1 = etree.SubElement(rec, SR + "ResourceCapacityUsed")
-            e1.text = str(share.stats['bytesused'])
-
-            # StAR ResourceCapacityAllocated (Optional)
-            e3 = etree.SubElement(rec, SR + "ResourceCapacityAllocated")
-            e3.text = str(share.stats['quota'])
-
-            # if not endpoint.logicalcapacityused:
-            #     endpoint.logicalcapacityused = 0
-            #
-            # e2 = etree.SubElement(rec, SR + "LogicalCapacityUsed")
-            # e2.text = str(endpoint.logicalcapacityused)
-
-            root = data.getroottree().getroot()
-            sub_element = copy.deepcopy(root[0])
-            xmlroot.append(sub_element)
-
-    return etree.tostring(xmlroot, pretty_print=True, encoding='unicode')
+    # All records in the report share the same creation time.
+    create_time = _format_iso8601(int(time.time()))
+
+    # Indentation written before records, their fields and the closing tags.
+    if pretty:
+        _record_indent, _field_indent, _end_indent = "\n  ", "\n    ", "\n"
+    else:
+        _record_indent = _field_indent = _end_indent = ""
+
+    # Records are written out and handed over to the caller as they are
+    # built, so neither the tree nor the whole document are held in memory.
+    _buff = BytesIO()
+
+    with etree.xmlfile(_buff, encoding='UTF-8') as xf:
+        xf.write_declaration()
+
+        with xf.element(_SR_STORAGE_USAGE_RECORDS, nsmap=_SR_NSMAP):
+            for endpoint in storage_endpoints:
+                for share in endpoint.storage_shares:
+                    if (
+                        skip_empty
+                        and not share.stats['filecount']
+                        and not share.stats['bytesused']
+                    ):
+                        continue
+
+                    if _record_indent:
+                        xf.write(_record_indent)
+
+                    _stats = share.stats
+                    _star_fields = share.star_fields
+                    _uri = share.uri
+
+                    with xf.element(_SR_STORAGE_USAGE_RECORD):
+                        # StAR recordID field (Required)
+                        recid = "%s-%s-%d" % (share.id, _RECORD_ID_PREFIX, next(_RECORD_ID_COUNTER))
+                        _write_star_field(
+                            xf,
+                            _field_indent,
+                            _SR_RECORD_IDENTITY,
+                            attrib={_SR_CREATE_TIME: create_time, _SR_RECORD_ID: recid},
+                        )
+
+                        # StAR StorageShare field (Optional)
+                        if _star_fields['storageshare']:
+                            _write_star_field(xf, _field_indent, _SR_STORAGE_SHARE, _star_fields['storageshare'])
+
+                        # StAR StorageSystem field (Required)
+                        if _uri['hostname']:
+                            _write_star_field(xf, _field_indent, _SR_STORAGE_SYSTEM, _uri['hostname'])
+
+                        # StAR StartTime field (Required)
+                        _write_star_field(xf, _field_indent, _SR_START_TIME, _format_iso8601(int(_stats['starttime'])))
+
+                        # StAR EndTime field (Required)
+                        _write_star_field(xf, _field_indent, _SR_END_TIME, _format_iso8601(int(_stats['endtime'])))
+
+                        # StAR FileCount field (Optional)
+                        if _stats['filecount']:
+                            _write_star_field(xf, _field_indent, _SR_FILE_COUNT, str(_stats['filecount']))
+
+                        # StAR ResourceCapacityUsed (Required)
+                        _write_star_field(xf, _field_indent, _SR_RESOURCE_CAPACITY_USED, str(_stats['bytesused']))
+
+                        # StAR ResourceCapacityAllocated (Optional)
+                        _write_star_field(xf, _field_indent, _SR_RESOURCE_CAPACITY_ALLOCATED, str(_stats['quota']))
+
+                        if _record_indent:
+                            xf.write(_record_indent)
+
+                    xf.flush()
+                    yield _buff.getvalue()
+                    _buff.seek(0)
+                    _buff.truncate()
+
+            if _end_indent:
+                xf.write(_end_indent)
+
+    yield _buff.getvalue()
 
 
 def process_rfc4331_response(response, storage_share):
@@ -201,18 +337,23 @@ def process_rfc4331_response(response, storage_share):
 
     """
     _tree = etree.fromstring(response.content)
-    _node = _tree.find('.//{DAV:}quota-available-bytes').text
+    _quota = {
+        _node.tag: _node.text
+        for _node in _tree.iter(_DAV_QUOTA_AVAILABLE_BYTES, _DAV_QUOTA_USED_BYTES)
+    }
+    _quota_available_bytes = _quota.get(_DAV_QUOTA_AVAILABLE_BYTES)
+    _quota_used_bytes = _quota.get(_DAV_QUOTA_USED_BYTES)
 
     # Check that we got the requested information. If not, then
     # the method is not supported.
-    if _node is None:
+    if _quota_available_bytes is None or _quota_used_bytes is None:
         raise dynafed_storagestats.exceptions.ErrorDAVQuotaMethod(
             error="UnsupportedMethod"
         )
 
     # Assign the values returned by the endpoint.
-    storage_share.stats['bytesused'] = int(_tree.find('.//{DAV:}quota-used-bytes').text)
-    storage_share.stats['bytesfree'] = int(_tree.find('.//{DAV:}quota-available-bytes').text)
+    storage_share.stats['bytesused'] = int(_quota_used_bytes)
+    storage_share.stats['bytesfree'] = int(_quota_available_bytes)
 
     # Determine which value to use for the quota.
     if storage_share.plugin_settings['storagestats.quota'] == 'api':
@@ -42,16 +42,17 @@ setup(
         'Programming Language :: Python :: 3',
     ],
     packages=find_packages(exclude=['docs', 'scripts', 'tests']),
-    python_requires='~=3.4',
+    python_requires='~=3.6',
     install_requires=[
-        'azure-storage==0.36.0',
-        'boto3',
-        'lxml',
+        'azure-storage-blob>=12.0.0',
+        'boto3>=1.12.0',
+        'lxml>=4.9',
         'prometheus_client',
         'python-memcached',
         'PyYAML',
         'requests',
-        'requests_aws4auth'
+        'requests_aws4auth',
+        'urllib3>=1.26'
     ],
     entry_points={
         'console_scripts': [
@@ -0,0 +1,513 @@
+"""Tests for dynafed_storagestats."""
+
+import gzip
+import importlib.util
+import io
+import os
+import socket
+import tempfile
+import unittest
+
+from types import SimpleNamespace
+from unittest import mock
+
+from lxml import etree
+import requests
+import urllib3
+
+import dynafed_storagestats.exceptions
+from dynafed_storagestats import configloader
+from dynafed_storagestats import helpers
+from dynafed_storagestats import output
+from dynafed_storagestats import xml
+from dynafed_storagestats.dav import helpers as davhelpers
+
+
+# PROPFIND reply listing two files, as sent by a DAV endpoint.
+_DAV_MULTISTATUS = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<d:multistatus xmlns:d="DAV:">'
+    b'<d:response><d:href>/path/a</d:href><d:propstat><d:prop>'
+    b'<d:getcontentlength>100</d:getcontentlength>'
+    b'</d:prop></d:propstat></d:response>'
+    b'<d:response><d:href>/path/b</d:href><d:propstat><d:prop>'
+    b'<d:getcontentlength>23</d:getcontentlength>'
+    b'</d:prop></d:propstat></d:response>'
+    b'</d:multistatus>'
+)
+
+
+class _TimingOutBody(io.BytesIO):
+    """Response body whose socket times out after the first read."""
+
+    def read(self, *args, **kwargs):
+        if self.tell():
+            raise socket.timeout('timed out')
+
+        return super().read(*args, **kwargs)
+
+
+class _FakeS3Client():
+    """Stand-in boto3 S3 client listing the objects in a dict."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.prefixes_listed = []
+
+    def get_paginator(self, method):
+        return self
+
+    def paginate(self, Bucket, Prefix, PaginationConfig, Delimiter=None):
+        self.prefixes_listed.append((Prefix, Delimiter))
+        _contents = []
+        _common_prefixes = []
+
+        for _key in sorted(self.objects):
+            if not _key.startswith(Prefix):
+                continue
+
+            _rest = _key[len(Prefix):]
+            if Delimiter and Delimiter in _rest:
+                _common_prefix = Prefix + _rest.split(Delimiter)[0] + Delimiter
+                if _common_prefix not in _common_prefixes:
+                    _common_prefixes.append(_common_prefix)
+
+            else:
+                _contents.append({'Key': _key, 'Size': self.objects[_key]})
+
+        _page_size = PaginationConfig['PageSize']
+        for _start in range(0, max(len(_contents), 1), _page_size):
+            _page = {}
+            if _start == 0 and _common_prefixes:
+                _page['CommonPrefixes'] = [{'Prefix': _p} for _p in _common_prefixes]
+            if _contents[_start:_start + _page_size]:
+                _page['Contents'] = _contents[_start:_start + _page_size]
+
+            yield _page
+
+
+def _dav_storage_share():
+    """Return a stand-in DAV StorageShare with the settings list_files uses."""
+    return SimpleNamespace(
+        id='dav-share',
+        uri={'scheme': 'https', 'netloc': 'dav.example.org', 'path': '/path'},
+        plugin_settings={
+            'storagestats.api': 'list-objects',
+            'storagestats.quota': '1000',
+        },
+        stats={'bytesused': -1, 'filecount': -1},
+    )
+
+
+def _stats_storage_share(id, frequency='600', **stats):
+    """Return a stand-in StorageShare with the attributes the outputs use."""
+    _stats = {
+        'starttime': 1600000000,
+        'endtime': 1600000060,
+        'quota': 1000,
+        'bytesused': 250,
+        'bytesfree': 750,
+        'filecount': 3,
+    }
+    _stats.update(stats)
+
+    return SimpleNamespace(
+        id=id,
+        uri={'hostname': 'storage.example.org'},
+        plugin_settings={'storagestats.frequency': frequency},
+        star_fields={'storageshare': id},
+        storageprotocol='https',
+        stats=_stats,
+        status='[OK][OK][200]',
+    )
+
+
+def _streamed_response(body, headers=None, status=207):
+    """Return a requests Response whose body is streamed from body."""
+    _response = requests.Response()
+    _response.status_code = status
+    _response.headers.update(headers or {})
+    _response.raw = urllib3.response.HTTPResponse(
+        body=body,
+        headers=headers,
+        status=status,
+        preload_content=False,
+        enforce_content_length=True,
+    )
+
+    return _response
+
+
+class ConfigParseTest(unittest.TestCase):
+    """Test configloader.parse_conf_files()."""
+
+    _CONFIG = (
+        "# S3 bucket, its ID has a dot in it.\n"
+        "glb.locplugin[]: /usr/lib64/ugr/libugrlocplugin_s3.so s3.bucket 15 s3s://bucket.s3.example.org/\n"
+        "locplugin.s3.bucket.s3.pub_key: pub\n"
+        "locplugin.s3.bucket.s3.priv_key: priv\n"
+        "locplugin.*.conn_timeout: 20\n"
+        "\n"
+        "glb.locplugin[]: /usr/lib64/ugr/libugrlocplugin_dav.so dav 15 davs://dav.example.org/path\n"
+        "locplugin.dav.cli_certificate: /tmp/cert.pem\n"
+        "locplugin.dav.conn_timeout: 5\n"
+        "glb.debug: 1\n"
+    )
+
+    def _parse(self, config, storage_shares_mask=[]):
+        with tempfile.TemporaryDirectory() as _path:
+            _config_file = os.path.join(_path, 'endpoints.conf')
+            with open(_config_file, 'w') as _file:
+                _file.write(config)
+
+            return configloader.parse_conf_files([_config_file], storage_shares_mask)
+
+    def test_parses_storage_shares(self):
+        """Shares get their plugin, URL and settings, globals included."""
+        self.assertEqual(
+            self._parse(self._CONFIG),
+            {
+                's3.bucket': {
+                    'id': 's3.bucket',
+                    'url': 's3s://bucket.s3.example.org/',
+                    'plugin': 'libugrlocplugin_s3.so',
+                    'plugin_settings': {
+                        's3.pub_key': 'pub',
+                        's3.priv_key': 'priv',
+                        'conn_timeout': '20',
+                    },
+                },
+                'dav': {
+                    'id': 'dav',
+                    'url': 'davs://dav.example.org/path',
+                    'plugin': 'libugrlocplugin_dav.so',
+                    'plugin_settings': {
+                        'cli_certificate': '/tmp/cert.pem',
+                        'conn_timeout': '5',
+                    },
+                },
+            }
+        )
+
+    def test_storage_shares_mask(self):
+        """Only the shares in the mask are returned."""
+        self.assertEqual(list(self._parse(self._CONFIG, ['dav'])), ['dav'])
+
+    def test_setting_id_mismatch(self):
+        """A setting for a share other than the current one is an error."""
+        with self.assertRaises(dynafed_storagestats.exceptions.ConfigFileErrorIDMismatch):
+            self._parse(self._CONFIG + "locplugin.s3.bucket.s3.region: us-east-1\n")
+
+
+class DAVListFilesTest(unittest.TestCase):
+    """Test dav.helpers.list_files() with streamed PROPFIND replies."""
+
+    def _list_files(self, response):
+        _storage_share = _dav_storage_share()
+
+        with mock.patch.object(davhelpers, 'send_dav_request', return_value=response):
+            davhelpers.list_files(_storage_share)
+
+        return _storage_share
+
+    def test_sums_file_sizes(self):
+        """Sizes and file count are summed from the streamed body."""
+        _storage_share = self._list_files(
+            _streamed_response(io.BytesIO(_DAV_MULTISTATUS))
+        )
+
+        self.assertEqual(_storage_share.stats['bytesused'], 123)
+        self.assertEqual(_storage_share.stats['filecount'], 2)
+        self.assertEqual(_storage_share.stats['bytesfree'], 877)
+
+    def test_empty_compressed_body(self):
+        """An empty gzip body without Content-Length lists no files."""
+        _storage_share = self._list_files(
+            _streamed_response(
+                io.BytesIO(gzip.compress(b'')),
+                headers={'Content-Encoding': 'gzip'},
+            )
+        )
+
+        self.assertEqual(_storage_share.stats['bytesused'], 0)
+        self.assertEqual(_storage_share.stats['filecount'], 0)
+
+    def test_truncated_body(self):
+        """A body shorter than its Content-Length is a ConnectionError."""
+        _response = _streamed_response(
+            io.BytesIO(_DAV_MULTISTATUS[:150]),
+            headers={'Content-Length': str(len(_DAV_MULTISTATUS))},
+        )
+
+        with self.assertRaises(dynafed_storagestats.exceptions.ConnectionError):
+            self._list_files(_response)
+
+    def test_timeout_while_streaming(self):
+        """A read timeout part way through the body is a ConnectionError."""
+        _response = _streamed_response(_TimingOutBody(_DAV_MULTISTATUS))
+
+        with self.assertRaises(dynafed_storagestats.exceptions.ConnectionError):
+            self._list_files(_response)
+
+    def test_malformed_body(self):
+        """A body that isn't well-formed XML is a ConnectionError."""
+        _response = _streamed_response(io.BytesIO(_DAV_MULTISTATUS[:-20]))
+
+        with self.assertRaises(dynafed_storagestats.exceptions.ConnectionError):
+            self._list_files(_response)
+
+
+class DAVRetryTest(unittest.TestCase):
+    """Test the retry policy of the DAV requests session."""
+
+    def test_retries_throttling_and_server_errors(self):
+        """Only the statuses in the forcelist are retried."""
+        for _status in (429, 500, 502, 503, 504):
+            self.assertTrue(davhelpers._RETRY.is_retry('PROPFIND', _status))
+
+        for _status in (207, 401, 404):
+            self.assertFalse(davhelpers._RETRY.is_retry('PROPFIND', _status))
+
+    def test_no_retry_on_connection_errors(self):
+        """Connection, read and SSL errors are raised on the first attempt."""
+        for _error in (
+            urllib3.exceptions.ConnectTimeoutError(),
+            urllib3.exceptions.ReadTimeoutError(None, '/', 'Read timed out.'),
+            urllib3.exceptions.SSLError(),
+        ):
+            with self.assertRaises(urllib3.exceptions.MaxRetryError):
+                davhelpers._RETRY.increment(method='PROPFIND', url='/', error=_error)
+
+
+class FormatStARTest(unittest.TestCase):
+    """Test xml.format_StAR()."""
+
+    def _records(self, storage_shares, **kwargs):
+        _chunks = list(
+            xml.format_StAR(
+                [SimpleNamespace(storage_shares=storage_shares)], **kwargs
+            )
+        )
+        _root = etree.fromstring(b''.join(_chunks))
+
+        return _chunks, _root.findall(xml._SR_STORAGE_USAGE_RECORD)
+
+    def test_one_chunk_per_record(self):
+        """Each record is handed over as its own chunk."""
+        _chunks, _records = self._records(
+            [_stats_storage_share('first'), _stats_storage_share('second')]
+        )
+
+        self.assertEqual(len(_records), 2)
+        self.assertEqual(len(_chunks), 3)
+
+    def test_record_fields(self):
+        """Records carry the share's stats in the StAR fields."""
+        _chunks, _records = self._records([_stats_storage_share('first')])
+
+        self.assertEqual(_records[0].findtext(xml._SR_STORAGE_SHARE), 'first')
+        self.assertEqual(_records[0].findtext(xml._SR_STORAGE_SYSTEM), 'storage.example.org')
+        self.assertEqual(_records[0].findtext(xml._SR_START_TIME), '2020-09-13T12:26:40Z')
+        self.assertEqual(_records[0].findtext(xml._SR_END_TIME), '2020-09-13T12:27:40Z')
+        self.assertEqual(_records[0].findtext(xml._SR_FILE_COUNT), '3')
+        self.assertEqual(_records[0].findtext(xml._SR_RESOURCE_CAPACITY_USED), '250')
+        self.assertEqual(_records[0].findtext(xml._SR_RESOURCE_CAPACITY_ALLOCATED), '1000')
+
+    def test_skip_empty(self):
+        """Shares without files or used space can be left out."""
+        _chunks, _records = self._records(
+            [
+                _stats_storage_share('first'),
+                _stats_storage_share('empty', bytesused=0, filecount=0),
+            ],
+            skip_empty=True,
+        )
+
+        self.assertEqual(
+            [_record.findtext(xml._SR_STORAGE_SHARE) for _record in _records],
+            ['first']
+        )
+
+
+class MemcachedTest(unittest.TestCase):
+    """Test the batched memcached uploads and lookups."""
+
+    def test_upload_grouped_by_ttl(self):
+        """Shares are sent with one set_multi per TTL and failures returned."""
+        _storage_shares = [
+            _stats_storage_share('first', frequency='600'),
+            _stats_storage_share('second', frequency='600'),
+            _stats_storage_share('third', frequency='60'),
+        ]
+
+        with mock.patch.object(
+            output.memcache, 'set_multi', return_value=['Ugrstoragestats_second']
+        ) as _set_multi:
+            _failed = output.to_memcached_multi(_storage_shares, '127.0.0.1', '11211')
+
+        self.assertEqual([_share.id for _share in _failed], ['second'])
+        self.assertEqual(
+            sorted(
+                (_call.args[3], sorted(_call.args[0]))
+                for _call in _set_multi.call_args_list
+            ),
+            [
+                (3600, ['Ugrstoragestats_third']),
+                (6000, ['Ugrstoragestats_first', 'Ugrstoragestats_second']),
+            ]
+        )
+        self.assertEqual(
+            _set_multi.call_args_list[0].args[0]['Ugrstoragestats_first'],
+            'first%%https%%1600000000%%1000%%250%%750%%[OK][OK][200]'
+        )
+
+    def test_lookup_in_one_request(self):
+        """All shares are read with a single get_multi."""
+        _storage_shares = [_stats_storage_share('first'), _stats_storage_share('second')]
+
+        with mock.patch.object(
+            helpers.memcache,
+            'get_multi',
+            return_value={
+                'Ugrstoragestats_first': b'first%%stats',
+                'Ugrstoragestats_second': 'second%%stats',
+            },
+        ) as _get_multi:
+            _stats = helpers.get_cached_storage_stats(_storage_shares)
+
+        _get_multi.assert_called_once()
+        self.assertEqual(_stats, 'first%%stats&&second%%stats')
+
+    def test_lookup_missing_index(self):
+        """A share missing from memcached is an index error."""
+        with mock.patch.object(
+            helpers.memcache,
+            'get_multi',
+            return_value={'Ugrstoragestats_first': 'first%%stats'},
+        ):
+            with self.assertRaises(dynafed_storagestats.exceptions.MemcachedIndexError):
+                helpers.get_cached_storage_stats(
+                    [_stats_storage_share('first'), _stats_storage_share('second')]
+                )
+
+
+class ProcessStoragestatsTest(unittest.TestCase):
+    """Test helpers.process_storagestats()."""
+
+    def test_unexpected_error_is_not_ok(self):
+        """An unexpected exception marks every share on the endpoint as failed."""
+        _storage_shares = [
+            SimpleNamespace(
+                id=_id,
+                plugin_settings={'storagestats.quota': 'api'},
+                stats={
+                    'check': True,
+                    'bytesused': -1,
+                    'bytesfree': -1,
+                    'filecount': -1,
+                    'quota': 1000**4,
+                },
+                debug=[],
+                status=[],
+                get_storagestats=mock.Mock(side_effect=RuntimeError('bug')),
+            )
+            for _id in ('first', 'second')
+        ]
+        _storage_endpoint = SimpleNamespace(
+            url='https://example.org',
+            storage_shares=_storage_shares,
+        )
+
+        with self.assertLogs('dynafed_storagestats.helpers', level='ERROR'):
+            helpers.process_storagestats(_storage_endpoint, None)
+
+        for _storage_share in _storage_shares:
+            self.assertEqual(
+                _storage_share.status, '[ERROR][RuntimeError][090]'
+            )
+
+
+@unittest.skipUnless(importlib.util.find_spec('boto3'), "boto3 is not installed")
+class S3ListObjectsTest(unittest.TestCase):
+    """Test s3.helpers.list_objects() for the storage stats."""
+
+    def setUp(self):
+        from dynafed_storagestats.s3 import helpers as s3helpers
+        self.s3helpers = s3helpers
+
+        self.objects = {'a': 1, 'b': 2, 'd1/x': 10, 'd1/y': 20, 'd2/z/q': 100}
+        for _i in range(2500):
+            self.objects['big/%d' % _i] = 1
+
+    def _list_objects(self, client):
+        _storage_share = SimpleNamespace(
+            id='s3-bucket',
+            uri={'bucket': 'bucket'},
+            plugin_settings={'storagestats.quota': '100000'},
+            stats={},
+        )
+
+        with mock.patch.object(self.s3helpers, 'get_s3_boto_client', return_value=client):
+            self.s3helpers.list_objects(_storage_share)
+
+        return _storage_share
+
+    def test_sums_prefixes(self):
+        """Top level objects and every prefix are added up."""
+        _client = _FakeS3Client(self.objects)
+        _storage_share = self._list_objects(_client)
+
+        self.assertEqual(_storage_share.stats['bytesused'], 2633)
+        self.assertEqual(_storage_share.stats['filecount'], 2505)
+        self.assertEqual(
+            sorted(_client.prefixes_listed),
+            [('', '/'), ('big/', None), ('d1/', None), ('d2/', None)]
+        )
+
+    def test_too_many_prefixes(self):
+        """Over the prefix limit the bucket is listed in one flat pass."""
+        _client = _FakeS3Client(self.objects)
+
+        with mock.patch.object(self.s3helpers, '_LIST_OBJECTS_MAX_PREFIXES', 2):
+            _storage_share = self._list_objects(_client)
+
+        self.assertEqual(_storage_share.stats['bytesused'], 2633)
+        self.assertEqual(_storage_share.stats['filecount'], 2505)
+        self.assertEqual(_client.prefixes_listed, [('', '/'), ('', None)])
+
+
+class ToPlaintextTest(unittest.TestCase):
+    """Test output.to_plaintext()."""
+
+    def test_writes_report(self):
+        """Report has the header and one line per storage share."""
+        _storage_share = SimpleNamespace(
+            id='s3-bucket',
+            uri={'url': 'https://s3.example.org/bucket'},
+            plugin_settings={'xlatepfx': '/dynafed/s3 /'},
+            storageprotocol='s3',
+            stats={
+                'starttime': 1600000000,
+                'quota': 1000,
+                'bytesused': 250,
+                'bytesfree': 750,
+                'filecount': 3,
+            },
+        )
+        _storage_endpoint = SimpleNamespace(storage_shares=[_storage_share])
+
+        with tempfile.TemporaryDirectory() as _path:
+            output.to_plaintext([_storage_endpoint], 'report.txt', _path)
+
+            with open(os.path.join(_path, 'report.txt')) as _file:
+                _contents = _file.read()
+
+        self.assertEqual(
+            _contents,
+            "ID URL MountPoint Protocol Timestamp Quota BytesUsed BytesFree FileCount\n"
+            "s3-bucket https://s3.example.org/bucket /dynafed/s3 s3 1600000000 1000 250 750 3\n"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()